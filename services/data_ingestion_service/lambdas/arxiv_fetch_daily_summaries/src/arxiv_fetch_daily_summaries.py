@@ -1,17 +1,109 @@
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+import gzip
+import io
 import logging
 import os
-import re
 import time
-from typing import List
+from typing import List, Optional, Set, Tuple
 
 import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
+from botocore.exceptions import ClientError
 import psycopg2
+from psycopg2.extras import execute_values
 import requests
-import xml.etree.ElementTree as ET
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
+try:
+    from lxml import etree as ET
 
-logging.getLogger().setLevel(logging.INFO)
+    ITERPARSE_OPTIONS = {"resolve_entities": False}
+except ImportError:
+    import xml.etree.ElementTree as ET
+
+    ITERPARSE_OPTIONS = {}
+
+OAI_NAMESPACE = "{http://www.openarchives.org/OAI/2.0/}"
+RECORD_TAG = f"{OAI_NAMESPACE}record"
+RESUMPTION_TOKEN_TAG = f"{OAI_NAMESPACE}resumptionToken"
+OAI_DC_TAG = "{http://www.openarchives.org/OAI/2.0/oai_dc/}dc"
+DC_NAMESPACE = "{http://purl.org/dc/elements/1.1/}"
+DC_DESCRIPTION_TAG = f"{DC_NAMESPACE}description"
+DC_DATE_TAG = f"{DC_NAMESPACE}date"
+DC_TYPE_TAG = f"{DC_NAMESPACE}type"
+REQUEST_INTERVAL_SECONDS = 5
+HTTP_TIMEOUT = (5, 60)
+MAX_RETRY_AFTER_SECONDS = 120
+S3_UPLOAD_CONCURRENCY = 16
+MULTIPART_THRESHOLD = 8 * 1024 * 1024
+TRANSFER_CONFIG = TransferConfig(multipart_threshold=MULTIPART_THRESHOLD, multipart_chunksize=MULTIPART_THRESHOLD,
+                                 max_concurrency=8, use_threads=True)
+
+logging.getLogger().setLevel(os.environ.get("LOG_LEVEL", "INFO"))
+
+_s3_client = None
+_events_client = None
+_db_connection = None
+
+
+def create_http_session() -> requests.Session:
+    """
+    Creates an HTTP session that keeps connections alive between requests.
+
+    Connection errors are retried by the adapter; HTTP errors such as 503 are
+    left to handle_http_error.
+
+    Returns:
+        requests.Session: HTTP session.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=32, max_retries=Retry(total=3, backoff_factor=2))
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+HTTP_SESSION = create_http_session()
+
+
+def get_s3_client():
+    """
+    Gets the S3 client, created once per container and reused by warm
+    invocations.
+
+    The connection pool is sized for the concurrent uploads, including the
+    parts of one multipart upload.
+
+    Returns:
+        S3 client.
+    """
+    global _s3_client
+    if _s3_client is None:
+        _s3_client = boto3.client(
+            "s3",
+            config=Config(
+                tcp_keepalive=True,
+                max_pool_connections=S3_UPLOAD_CONCURRENCY + TRANSFER_CONFIG.max_concurrency,
+                retries={"mode": "standard"},
+            ),
+        )
+    return _s3_client
+
+
+def get_events_client():
+    """
+    Gets the EventBridge client, created once per container.
+
+    Returns:
+        EventBridge client.
+    """
+    global _events_client
+    if _events_client is None:
+        _events_client = boto3.client("events")
+    return _events_client
 
 
 def lambda_handler(event: dict, context) -> dict:
@@ -76,20 +168,35 @@ def initialize_db() -> (psycopg2.extensions.connection, psycopg2.extensions.curs
     """
     Initializes database connection.
 
+    The connection is kept open between warm invocations. A reused
+    connection is rolled back and must answer a trivial query; if its
+    socket was dropped, a new connection is opened.
+
     Returns:
         psycopg2.extensions.connection: Database connection.
         psycopg2.extensions.cursor: Database cursor.
     """
-    conn = psycopg2.connect(
-        host=os.environ.get("DATABASE_HOST"),
-        port=os.environ.get("DATABASE_PORT"),
-        user=os.environ.get("DATABASE_USER"),
-        password=os.environ.get("DATABASE_PASSWORD"),
-        dbname=os.environ.get("DATABASE_NAME"),
-        sslmode=os.environ.get("DATABASE_SSL_MODE"),
-    )
-    cursor = conn.cursor()
-    return conn, cursor
+    global _db_connection
+    if _db_connection is not None and not _db_connection.closed:
+        try:
+            _db_connection.rollback()
+            with _db_connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            _db_connection.close()
+    if _db_connection is None or _db_connection.closed:
+        _db_connection = psycopg2.connect(
+            host=os.environ.get("DATABASE_HOST"),
+            port=os.environ.get("DATABASE_PORT"),
+            user=os.environ.get("DATABASE_USER"),
+            password=os.environ.get("DATABASE_PASSWORD"),
+            dbname=os.environ.get("DATABASE_NAME"),
+            sslmode=os.environ.get("DATABASE_SSL_MODE"),
+            keepalives=1,
+            keepalives_idle=30,
+        )
+    cursor = _db_connection.cursor()
+    return _db_connection, cursor
 
 
 def calculate_from_date() -> str:
@@ -115,17 +222,18 @@ def get_earliest_unfetched_date(cursor, days=5) -> str:
         str: Earliest unfetched date.
     """
     today = datetime.today()
-    past_dates = [(today - timedelta(days=i)).strftime("%Y-%m-%d") for i in range(1, days + 1)]
+    start_date = (today - timedelta(days=days)).strftime("%Y-%m-%d")
+    end_date = (today - timedelta(days=1)).strftime("%Y-%m-%d")
 
     try:
         cursor.execute(
-            "SELECT fetch_date FROM research_fetch_status WHERE fetch_date = ANY(%s::DATE[]) AND status = 'success'",
-            (past_dates,)
+            "SELECT d::DATE FROM generate_series(%s::DATE, %s::DATE, '1 day') AS d "
+            "LEFT JOIN research_fetch_status r ON r.fetch_date = d::DATE AND r.status = 'success' "
+            "WHERE r.fetch_date IS NULL ORDER BY d LIMIT 1",
+            (start_date, end_date)
         )
-        fetched_dates = [result[0].strftime("%Y-%m-%d") for result in cursor.fetchall()]
-        unfetched_dates = list(set(past_dates) - set(fetched_dates))
-
-        earliest_date = min(unfetched_dates) if unfetched_dates else None
+        result = cursor.fetchone()
+        earliest_date = result[0].strftime("%Y-%m-%d") if result else None
     except Exception as e:
         logging.error(f"Database query failed: {str(e)}")
         earliest_date = None
@@ -147,6 +255,22 @@ def insert_fetch_status(date, cursor):
     )
 
 
+def insert_fetch_statuses(dates: List[str], cursor):
+    """
+    Inserts fetch status as 'pending' for the given dates in one statement.
+
+    Args:
+        dates (List[str]): Dates for which to insert fetch status.
+        cursor: Database cursor.
+    """
+    execute_values(
+        cursor,
+        "INSERT INTO research_fetch_status (fetch_date, status) VALUES %s ON CONFLICT (fetch_date) DO NOTHING",
+        [(date,) for date in dates],
+        template="(%s, 'pending')"
+    )
+
+
 def generate_date_list(start_date_str: str, end_date_str: str) -> List[str]:
     """
     Generates a list of dates between the given start and end dates.
@@ -178,42 +302,54 @@ def attempt_fetch_for_dates(base_url: str, summary_set: str, bucket_name: str, c
         earliest_unfetched_date (str): Earliest unfetched date.
     """
     if earliest_unfetched_date:
-        full_xml_responses = fetch_data(base_url, earliest_unfetched_date, summary_set)
+        full_xml_responses, summary_dates = fetch_data(base_url, earliest_unfetched_date, summary_set)
         date_list = generate_date_list(earliest_unfetched_date, today)
         logging.info(f"Date list: {date_list}")
 
+        insert_fetch_statuses(date_list, cursor)
+        fetch_statuses = []
         for date_to_fetch in date_list:
             logging.info(f"Fetching for date: {date_to_fetch}")
-            insert_fetch_status(date_to_fetch, cursor)
-            success = process_fetch(date_to_fetch, summary_set, bucket_name, cursor, full_xml_responses)
+            success = process_fetch(date_to_fetch, summary_set, bucket_name, full_xml_responses, summary_dates)
             if success:
                 logging.info(f"Fetch successful for date: {date_to_fetch}")
+                fetch_statuses.append((date_to_fetch, 'success'))
             else:
                 logging.error(f"Fetch failed for date: {date_to_fetch}")
+                fetch_statuses.append((date_to_fetch, 'failure'))
+        set_fetch_statuses(fetch_statuses, cursor)
     else:
         logging.warning(f"No unfetched dates found")
 
 
-def fetch_data(base_url: str, from_date: str, summary_set: str) -> List[str]:
+def fetch_data(base_url: str, from_date: str, summary_set: str) -> Tuple[List[bytes], Set[str]]:
     """
     Fetches data from the API.
 
+    Requests are spaced REQUEST_INTERVAL_SECONDS apart, counting the time
+    spent scanning the previous page.
+
     Args:
         base_url (str): Base URL for the API.
         from_date (str): Summary date.
         summary_set (str): Summary set.
 
     Returns:
-        List[str]: List of XML responses.
+        List[bytes]: List of XML responses.
+        Set[str]: Summary dates found in the responses.
     """
     full_xml_responses = []
+    summary_dates = set()
     params = {'verb': 'ListRecords', 'set': summary_set, 'metadataPrefix': 'oai_dc', 'from': from_date}
     retry_count = 0
+    next_request_time = time.monotonic()
     while True:
-        status_code, xml_content = fetch_http_response(base_url, params)
+        time.sleep(max(0.0, next_request_time - time.monotonic()))
+        status_code, xml_content, retry_after = fetch_http_response(base_url, params)
+        next_request_time = time.monotonic() + REQUEST_INTERVAL_SECONDS
         if status_code != 200:
             logging.error(f"HTTP error, probably told to back off: {status_code}")
-            backoff_time = handle_http_error(status_code, xml_content, retry_count)
+            backoff_time = handle_http_error(status_code, xml_content, retry_count, retry_after)
             if backoff_time:
                 time.sleep(backoff_time)
                 retry_count += 1
@@ -223,68 +359,99 @@ def fetch_data(base_url: str, from_date: str, summary_set: str) -> List[str]:
 
         full_xml_responses.append(xml_content)
 
-        resumption_token = extract_resumption_token(xml_content)
+        resumption_token = scan_xml_response(xml_content, summary_dates)
         if resumption_token:
             logging.info(f"Resumption token: {resumption_token}")
             params = {'verb': 'ListRecords', 'resumptionToken': resumption_token}
-            time.sleep(5)
         else:
             break
 
-    return full_xml_responses
+    return full_xml_responses, summary_dates
 
 
-def fetch_http_response(base_url: str, params: dict) -> tuple[int, str]:
+def fetch_http_response(base_url: str, params: dict) -> tuple[int, bytes, Optional[str]]:
     """Fetches HTTP response.
 
+    The request gives up after HTTP_TIMEOUT seconds to connect or between
+    bytes read; the session adapter retries timed out requests.
+
     Args:
         base_url (str): Base URL for the API.
         params (dict): Request parameters.
 
     Returns:
-        requests.Response: Response object.
+        int: Status code.
+        bytes: Response content.
+        Optional[str]: Retry-After header, if any.
     """
-    response = requests.get(base_url, params=params)
-    return response.status_code, response.text
+    response = HTTP_SESSION.get(base_url, params=params, timeout=HTTP_TIMEOUT)
+    return response.status_code, response.content, response.headers.get("Retry-After")
 
 
-def handle_http_error(status_code: int, response_text: str, retry_count: int) -> int:
+def handle_http_error(status_code: int, response_content: bytes, retry_count: int,
+                      retry_after: Optional[str] = None) -> int:
     """
     Handles HTTP error.
 
+    A 503 is retried after the server's Retry-After delay when it gives one
+    in seconds, and after the next fixed backoff time otherwise. A
+    Retry-After over MAX_RETRY_AFTER_SECONDS would outlast the Lambda, so the
+    fetch is scheduled for later instead.
+
     Args:
         status_code (int): HTTP status code.
-        response_text (str): Response text.
+        response_content (bytes): Response content.
         retry_count (int): Retry count.
+        retry_after (Optional[str]): Retry-After header.
 
     Returns:
         int: Backoff time.
     """
-    if "maintenance" in response_text.lower():
+    if b"maintenance" in response_content.lower():
         schedule_for_later()
         return 0
     backoff_times = [30, 120]
     if status_code == 503 and retry_count < len(backoff_times):
-        logging.info(f"Received 503, retrying after {backoff_times[retry_count]} seconds")
-        return backoff_times[retry_count]
+        backoff_time = int(retry_after) if retry_after and retry_after.strip().isdigit() else backoff_times[retry_count]
+        if backoff_time > MAX_RETRY_AFTER_SECONDS:
+            logging.info(f"Received 503 with Retry-After of {backoff_time} seconds, scheduling for later")
+            schedule_for_later()
+            return 0
+        logging.info(f"Received 503, retrying after {backoff_time} seconds")
+        return backoff_time
     return 0
 
 
-def extract_resumption_token(xml_content: str) -> str:
-    """Extracts resumption token from XML content.
+def scan_xml_response(xml_content: bytes, summary_dates: Set[str]) -> str:
+    """Extracts resumption token and summary dates from XML content.
+
+    The content is parsed incrementally and each record is cleared once
+    passed, so the full tree is never built. A record's date is a summary
+    date when it is its only date, directly after the description and
+    before a type of "text".
 
     Args:
-        xml_content (str): XML content.
+        xml_content (bytes): XML content.
+        summary_dates (Set[str]): Set the summary dates are added to.
 
     Returns:
         str: Resumption token.
     """
-    root = ET.fromstring(xml_content)
-    token_element = root.find(".//{http://www.openarchives.org/OAI/2.0/}resumptionToken")
-    return token_element.text if token_element is not None else ''
+    for _, element in ET.iterparse(io.BytesIO(xml_content), **ITERPARSE_OPTIONS):
+        if element.tag == OAI_DC_TAG:
+            children = list(element)
+            for previous, child, following in zip(children, children[1:], children[2:]):
+                if (child.tag == DC_DATE_TAG and previous.tag == DC_DESCRIPTION_TAG
+                        and following.tag == DC_TYPE_TAG and following.text == "text"):
+                    summary_dates.add(child.text)
+        elif element.tag == RECORD_TAG:
+            element.clear()
+        elif element.tag == RESUMPTION_TOKEN_TAG:
+            return element.text or ''
+    return ''
 
 
-def process_fetch(from_date, summary_set, bucket_name, cursor, fetched_data) -> bool:
+def process_fetch(from_date, summary_set, bucket_name, fetched_data, summary_dates) -> bool:
     """
     Processes the fetched data and uploads to S3.
 
@@ -292,83 +459,121 @@ def process_fetch(from_date, summary_set, bucket_name, cursor, fetched_data) ->
         from_date (str): Summary date.
         summary_set (str): Summary set.
         bucket_name (str): S3 bucket name.
-        cursor: Database cursor.
-        fetched_data (List[str]): List of XML responses.
+        fetched_data (List[bytes]): List of XML responses.
+        summary_dates (Set[str]): Summary dates found in the responses.
 
     Returns:
         bool: True if fetch was successful, False otherwise.
     """
-    pattern = r"</dc:description>\s+<dc:date>" + re.escape(from_date) + r"</dc:date>\s+<dc:type>text</dc:type>"
-    success = any(re.search(pattern, xml) for xml in fetched_data)
+    success = from_date in summary_dates
 
     if success:
         upload_to_s3(bucket_name, from_date, summary_set, fetched_data)
-        set_fetch_success(from_date, cursor)
-    else:
-        set_fetch_failure(from_date, cursor)
 
     return success
 
 
-def set_fetch_success(date, cursor):
-    """
-    Sets fetch status as 'success' for the given date.
-
-    Args:
-        date (str): Date for which to set fetch status.
-        cursor: Database cursor.
-    """
-    cursor.execute(
-        "UPDATE research_fetch_status SET status = 'success' WHERE fetch_date = %s",
-        (date,)
-    )
-
-
-def set_fetch_failure(date, cursor):
+def set_fetch_statuses(fetch_statuses: List[Tuple[str, str]], cursor):
     """
-    Sets fetch status as 'failure' for the given date.
+    Sets fetch status as 'success' or 'failure' for the given dates in one
+    statement. Failures also increment the retry count.
 
     Args:
-        date (str): Date for which to set fetch status.
+        fetch_statuses (List[Tuple[str, str]]): Dates and their fetch status.
         cursor: Database cursor.
     """
-    cursor.execute(
-        "UPDATE research_fetch_status SET status = 'failure', retry_count = retry_count + 1 WHERE fetch_date = %s",
-        (date,)
+    execute_values(
+        cursor,
+        "UPDATE research_fetch_status SET status = data.status, "
+        "retry_count = CASE WHEN data.status = 'failure' THEN retry_count + 1 ELSE retry_count END "
+        "FROM (VALUES %s) AS data (fetch_date, status) "
+        "WHERE research_fetch_status.fetch_date = data.fetch_date::DATE",
+        fetch_statuses
     )
 
 
-def upload_to_s3(bucket_name: str, from_date: str, summary_set: str, full_xml_responses: List[str]):
+def upload_to_s3(bucket_name: str, from_date: str, summary_set: str, full_xml_responses: List[bytes],
+                 max_concurrency: int = S3_UPLOAD_CONCURRENCY):
     """Uploads XML responses to S3.
 
+    The responses are gzipped and uploaded concurrently over a shared client.
+    Bodies over MULTIPART_THRESHOLD are uploaded in parallel parts. Objects
+    already stored by an earlier run are not overwritten.
+
     Args:
         bucket_name (str): S3 bucket name.
         from_date (str): Summary date.
         summary_set (str): Summary set.
-        full_xml_responses (List[str]): XML responses.
+        full_xml_responses (List[bytes]): XML responses.
+        max_concurrency (int): Maximum number of concurrent uploads.
     """
     logging.info(f"Uploading {len(full_xml_responses)} XML responses to S3")
-    s3 = boto3.client("s3")
+    if not full_xml_responses:
+        return
+    s3 = get_s3_client()
+
+    def put_response(idx: int, xml_response: bytes):
+        body = gzip.compress(xml_response, compresslevel=6)
+        key = f"arxiv/{summary_set}-{from_date}-{idx}.xml"
+        if len(body) > MULTIPART_THRESHOLD:
+            # upload_fileobj does not take IfNoneMatch, so check for the object first.
+            if object_exists(s3, bucket_name, key):
+                logging.info(f"Object already exists, skipping: {key}")
+                return
+            s3.upload_fileobj(io.BytesIO(body), bucket_name, key, Config=TRANSFER_CONFIG,
+                              ExtraArgs={"ContentEncoding": "gzip", "ContentType": "application/xml"})
+            return
+        try:
+            s3.put_object(
+                Body=body,
+                Bucket=bucket_name,
+                Key=key,
+                ContentEncoding="gzip",
+                ContentType="application/xml",
+                IfNoneMatch="*",
+            )
+        except ClientError as e:
+            if e.response["Error"]["Code"] != "PreconditionFailed":
+                raise
+            logging.info(f"Object already exists, skipping: {key}")
+
+    with ThreadPoolExecutor(max_workers=min(max_concurrency, len(full_xml_responses))) as executor:
+        list(executor.map(put_response, range(len(full_xml_responses)), full_xml_responses))
+
+
+def object_exists(s3, bucket_name: str, key: str) -> bool:
+    """
+    Checks whether an object exists in S3.
 
-    for idx, xml_response in enumerate(full_xml_responses):
-        s3.put_object(
-            Body=xml_response,
-            Bucket=bucket_name,
-            Key=f"arxiv/{summary_set}-{from_date}-{idx}.xml",
-        )
+    Args:
+        s3: S3 client.
+        bucket_name (str): S3 bucket name.
+        key (str): Object key.
+
+    Returns:
+        bool: True if the object exists, False otherwise.
+    """
+    try:
+        s3.head_object(Bucket=bucket_name, Key=key)
+    except ClientError as e:
+        if e.response["Error"]["Code"] in ("404", "NoSuchKey", "NotFound"):
+            return False
+        raise
+    return True
 
 
 def finalize_db(conn, cursor) -> None:
     """
     Finalizes database connection.
 
+    The connection is left open for the next warm invocation.
+
     Args:
         conn (psycopg2.extensions.connection): Database connection.
         cursor (psycopg2.extensions.cursor): Database cursor.
     """
     conn.commit()
     cursor.close()
-    conn.close()
 
 
 def schedule_for_later() -> None:
@@ -379,7 +584,7 @@ def schedule_for_later() -> None:
 
     cron_time = future_time.strftime('%M %H %d %m ? %Y')
 
-    client = boto3.client('events')
+    client = get_events_client()
 
     response = client.put_rule(
         Name='DynamicRule',
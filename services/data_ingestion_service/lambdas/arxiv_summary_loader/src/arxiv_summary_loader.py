@@ -1,12 +1,71 @@
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+import io
 import json
 import boto3
 import psycopg2
 from psycopg2 import sql
+from psycopg2.extras import execute_values
+from psycopg2.pool import ThreadedConnectionPool
 import os
 import logging
+import time
+
+try:
+    import orjson
+except ImportError:
+    import json as orjson
+
+try:
+    from isal import igzip as gzip
+except ImportError:
+    import gzip
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
 
 logger = logging.getLogger()
-logger.setLevel(logging.INFO)
+logger.setLevel(os.environ.get("LOG_LEVEL", "INFO"))
+
+LOOKUP_CACHE_TTL_SECONDS = int(os.environ.get("LOOKUP_CACHE_TTL_SECONDS", "300"))
+ASSOCIATION_PAGE_SIZE = 1000
+RECORDS_PER_COMMIT = 50
+LOADER_WORKERS = 4
+DATABASE_POOL_MIN_CONNECTIONS = LOADER_WORKERS
+DATABASE_POOL_MAX_CONNECTIONS = LOADER_WORKERS
+REQUIRED_FIELDS = frozenset(
+    {
+        "identifier",
+        "abstract_url",
+        "full_text_url",
+        "abstract",
+        "title",
+        "date",
+        "primary_category",
+        "primary_group",
+        "authors",
+        "categories",
+        "groups",
+    }
+)
+
+_lookups = None
+_lookups_loaded_at = 0.0
+_s3_client = None
+_connection_pool = None
+
+
+class LoaderConnection(psycopg2.extensions.connection):
+    """
+    PostgreSQL connection that remembers which statements have been prepared
+    on its session.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prepared_statements = set()
 
 
 def lambda_handler(event, context) -> dict:
@@ -26,9 +85,8 @@ def lambda_handler(event, context) -> dict:
     """
     try:
         bucket, key = get_s3_event_details(event)
-        content = get_s3_file_content(bucket, key)
-        data = json.loads(content)
-        process_records(data["records"])
+        records = orjson.loads(get_s3_file_content(bucket, key))["records"]
+        process_records(records)
     except Exception as e:
         logger.error(f"Error processing lambda function: {str(e)}")
         raise
@@ -58,24 +116,34 @@ def get_s3_event_details(event) -> tuple:
         raise
 
 
-def get_s3_file_content(bucket, key) -> str:
+def get_s3_file_content(bucket, key) -> bytes:
     """
     Reads the S3 file content.
 
+    Gzip- and zstd-encoded bodies are decompressed. The body is otherwise
+    returned undecoded; the JSON parser accepts bytes, so decoding here
+    would only add a second full-size copy.
+
     Args:
         bucket (str): S3 bucket name
         key (str): S3 object key
 
     Returns:
-        str: S3 file content
+        bytes: S3 file content
 
     Raises:
         Exception: If there is an error getting the S3 file content
     """
     try:
-        s3 = boto3.client("s3")
-        response = s3.get_object(Bucket=bucket, Key=key)
-        content = response["Body"].read().decode("utf-8")
+        response = get_s3_client().get_object(Bucket=bucket, Key=key)
+        content = response["Body"].read()
+        content_encoding = response.get("ContentEncoding")
+        if content_encoding == "gzip":
+            content = gzip.decompress(content)
+        elif content_encoding == "zstd":
+            if zstandard is None:
+                raise RuntimeError("zstandard is required to read zstd objects")
+            content = zstandard.ZstdDecompressor().decompress(content)
         return content
     except Exception as e:
         logger.error(
@@ -84,186 +152,570 @@ def get_s3_file_content(bucket, key) -> str:
         raise
 
 
+def get_s3_client():
+    """
+    Gets the S3 client, created once per container and reused by warm
+    invocations.
+
+    Returns:
+        botocore.client.BaseClient: S3 client
+    """
+    global _s3_client
+    if _s3_client is None:
+        _s3_client = boto3.client("s3")
+    return _s3_client
+
+
 def process_records(records):
     """
     Processes the records and inserts them into the PostgreSQL database.
 
+    Authors are upserted for the whole file first, so the batches that
+    follow never contend on the authors unique index. Records are then
+    written in batches of RECORDS_PER_COMMIT, each in its own transaction,
+    by up to LOADER_WORKERS threads on connections from the pool; psycopg2
+    releases the GIL while waiting on the server. Loading is idempotent, so
+    re-running a partially loaded file is safe.
+
     Args:
         records (list): List of records to process
 
     Raises:
+        ValueError: If a record is missing fields
         Exception: If there is an error processing the records
     """
+    for record in records:
+        validate_record(record)
+    conn = None
     try:
         conn = get_postgresql_connection()
         cursor = conn.cursor()
-        for record in records:
-            process_record(record, cursor)
+        lookups = get_lookups(cursor)
+        create_staging_tables(cursor)
+        author_ids = insert_authors(records, cursor)
         conn.commit()
         cursor.close()
-        conn.close()
     except Exception as e:
         logger.error(f"Error processing records: {str(e)}")
+        if conn is not None and not conn.closed:
+            conn.rollback()
         raise
+    finally:
+        if conn is not None:
+            release_postgresql_connection(conn)
+
+    batches = [
+        records[start : start + RECORDS_PER_COMMIT]
+        for start in range(0, len(records), RECORDS_PER_COMMIT)
+    ]
+    with ThreadPoolExecutor(max_workers=LOADER_WORKERS) as executor:
+        list(
+            executor.map(
+                partial(load_batch, lookups=lookups, author_ids=author_ids), batches
+            )
+        )
 
 
-def get_postgresql_connection():
+def load_batch(records, lookups, author_ids):
     """
-    Gets a connection to the PostgreSQL database.
+    Loads a batch of records in one transaction on a pooled connection.
 
-    Returns:
-        psycopg2.connection: PostgreSQL connection
+    Args:
+        records (list): List of records to load
+        lookups (dict): Category and group IDs, as returned by get_lookups
+        author_ids (dict): Author IDs keyed by (last_name, first_name)
+
+    Raises:
+        Exception: If there is an error loading the batch
     """
+    conn = None
     try:
-        return psycopg2.connect(
+        conn = get_postgresql_connection()
+        cursor = conn.cursor()
+        create_staging_tables(cursor)
+        process_batch(records, lookups, author_ids, cursor)
+        conn.commit()
+        cursor.close()
+    except Exception as e:
+        logger.error(f"Error loading batch: {str(e)}")
+        if conn is not None and not conn.closed:
+            conn.rollback()
+        raise
+    finally:
+        if conn is not None:
+            release_postgresql_connection(conn)
+
+
+def process_batch(records, lookups, author_ids, cursor):
+    """
+    Inserts a batch of records and their associations.
+
+    Research entries are streamed into a staging table with COPY and
+    upserted from there; the association rows are written with a statement
+    per table. Each table costs a handful of round trips per batch instead
+    of several per record.
+
+    Args:
+        records (list): List of records to insert
+        lookups (dict): Category and group IDs, as returned by get_lookups
+        author_ids (dict): Author IDs keyed by (last_name, first_name)
+        cursor (psycopg2.cursor): PostgreSQL cursor
+    """
+    research_ids = insert_research(records, lookups, cursor)
+    insert_research_authors(records, research_ids, author_ids, cursor)
+    insert_research_categories(records, research_ids, cursor)
+    insert_research_groups(records, research_ids, cursor)
+
+
+def get_connection_pool() -> ThreadedConnectionPool:
+    """
+    Gets the PostgreSQL connection pool, created once per container so warm
+    invocations reuse its connections. The pool keeps one connection open per
+    loader worker; psycopg2 closes connections returned above minconn, which
+    would make every warm invocation reconnect and re-prepare its statements.
+
+    Returns:
+        psycopg2.pool.ThreadedConnectionPool: PostgreSQL connection pool
+    """
+    global _connection_pool
+    if _connection_pool is None or _connection_pool.closed:
+        _connection_pool = ThreadedConnectionPool(
+            DATABASE_POOL_MIN_CONNECTIONS,
+            DATABASE_POOL_MAX_CONNECTIONS,
             host=os.environ.get("DATABASE_HOST"),
             port=os.environ.get("DATABASE_PORT"),
             user=os.environ.get("DATABASE_USER"),
             password=os.environ.get("DATABASE_PASSWORD"),
             dbname=os.environ.get("DATABASE_NAME"),
             sslmode=os.environ.get("DATABASE_SSL_MODE"),
+            connection_factory=LoaderConnection,
         )
+    return _connection_pool
+
+
+def get_postgresql_connection():
+    """
+    Gets a connection to the PostgreSQL database from the pool.
+
+    Pooled connections that no longer answer a trivial query are discarded
+    until one does; after a database restart every idle connection is dead,
+    so once the pool has been drained a fresh connection is opened. Return it
+    with release_postgresql_connection.
+
+    Returns:
+        psycopg2.connection: PostgreSQL connection
+    """
+    try:
+        pool = get_connection_pool()
+        for _ in range(DATABASE_POOL_MAX_CONNECTIONS):
+            conn = pool.getconn()
+            try:
+                with conn.cursor() as cursor:
+                    cursor.execute("SELECT 1")
+                return conn
+            except (psycopg2.OperationalError, psycopg2.InterfaceError) as e:
+                logger.warning(f"Discarding stale PostgreSQL connection: {str(e)}")
+                pool.putconn(conn, close=True)
+        return pool.getconn()
     except Exception as e:
         logger.error(f"Error getting PostgreSQL connection: {str(e)}")
         raise
 
 
-def get_category_id(category_name, cursor):
+def release_postgresql_connection(conn):
+    """
+    Returns a connection to the pool for reuse.
+
+    Args:
+        conn (psycopg2.connection): PostgreSQL connection
+    """
+    get_connection_pool().putconn(conn)
+
+
+def get_lookups(cursor) -> dict:
     """
-    Gets the category ID from the database.
+    Gets the category and group IDs used to resolve record references.
+
+    The IDs are read with one query per table and cached at module scope,
+    so warm invocations within LOOKUP_CACHE_TTL_SECONDS skip the queries.
 
     Args:
-        category_name (str): Category name
         cursor (psycopg2.cursor): PostgreSQL cursor
 
+    Returns:
+        dict: Category IDs keyed by abbreviation and group IDs keyed by label
+    """
+    global _lookups, _lookups_loaded_at
+    if (
+        _lookups is None
+        or time.monotonic() - _lookups_loaded_at > LOOKUP_CACHE_TTL_SECONDS
+    ):
+        categories_by_abbreviation = {}
+        cursor.execute(
+            "SELECT abbreviation, category_id FROM categories ORDER BY category_id"
+        )
+        for abbreviation, category_id in cursor.fetchall():
+            categories_by_abbreviation.setdefault(abbreviation, category_id)
+        groups = {}
+        cursor.execute("SELECT label, group_id FROM groups ORDER BY group_id")
+        for label, group_id in cursor.fetchall():
+            groups.setdefault(label, group_id)
+        _lookups = {
+            "categories_by_abbreviation": categories_by_abbreviation,
+            "groups": groups,
+        }
+        _lookups_loaded_at = time.monotonic()
+    return _lookups
+
+
+def get_category_id(category_name, categories):
+    """
+    Gets the category ID for a category abbreviation.
+
+    Args:
+        category_name (str): Category abbreviation
+        categories (dict): Category IDs keyed by abbreviation
+
     Returns:
         int: Category ID
     """
     if category_name == "Unknown":
         return None
-    cursor.execute(
-        "SELECT category_id FROM categories WHERE abbreviation = %s", (category_name,)
-    )
-    result = cursor.fetchone()
-    if result:
-        return result[0]
-    else:
-        return None
+    return categories.get(category_name)
+
+
+def get_group_id(group_name, groups):
+    """
+    Gets the group ID for a group label.
 
+    Args:
+        group_name (str): Group label
+        groups (dict): Group IDs keyed by label
 
-def get_group_id(group_name, cursor):
+    Returns:
+        int: Group ID
+    """
     if group_name == "Unknown":
         return None
-    cursor.execute("SELECT group_id FROM groups WHERE label = %s", (group_name,))
-    result = cursor.fetchone()
-    return result[0] if result else None
+    return groups.get(group_name)
 
 
-def process_record(record, cursor):
+def create_staging_tables(cursor):
     """
-    Processes a single record and inserts it into the PostgreSQL database.
+    Creates the session-local staging tables used to COPY rows in bulk.
+
+    The tables are temporary, so concurrent loaders never see each other's
+    rows, and their contents are discarded at the end of each transaction.
+    Both statements are sent in a single round trip.
 
     Args:
-        record (dict): Record to process
         cursor (psycopg2.cursor): PostgreSQL cursor
+    """
+    cursor.execute("""
+        CREATE TEMP TABLE IF NOT EXISTS research_stage ON COMMIT DELETE ROWS AS
+        SELECT unique_identifier, abstract_url, full_text_url, abstract, title, date, primary_category, primary_group
+        FROM research WITH NO DATA;
+        CREATE TEMP TABLE IF NOT EXISTS research_authors_stage ON COMMIT DELETE ROWS AS
+        SELECT last_name, first_name FROM research_authors WITH NO DATA;
+        """)
 
-    Raises:
-        Exception: If there is an error processing the record
+
+def copy_rows(table, columns, rows, cursor):
+    """
+    Streams rows into a table with COPY in text format.
+
+    Args:
+        table (str): Table name
+        columns (tuple): Column names, in row order
+        rows (list): Rows to copy
+        cursor (psycopg2.cursor): PostgreSQL cursor
+    """
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write("\t".join(format_copy_value(value) for value in row))
+        buffer.write("\n")
+    buffer.seek(0)
+    cursor.copy_expert(
+        sql.SQL("COPY {} ({}) FROM STDIN").format(
+            sql.Identifier(table), sql.SQL(", ").join(map(sql.Identifier, columns))
+        ),
+        buffer,
+    )
+
+
+def execute_prepared(name, statement, cursor):
     """
-    cursor.execute("BEGIN")
+    Executes a parameterless statement, preparing it on first use.
 
-    primary_category_id = get_category_id(record["primary_category"], cursor)
-    primary_group_id = get_group_id(record["primary_group"], cursor)
+    Prepared statements live as long as the session, so with the connection
+    reused across warm invocations each statement is parsed and planned
+    once per container rather than once per batch.
 
-    cursor.execute(
-        """
-        INSERT INTO research (unique_identifier, abstract_url, full_text_url, abstract, title, date, primary_category, primary_group)
-        VALUES (%s, %s, %s, %s, %s, %s, %s, %s) ON CONFLICT (unique_identifier) DO NOTHING RETURNING research_id
-        """,
-        (
+    Args:
+        name (str): Prepared statement name
+        statement (str): SQL statement
+        cursor (psycopg2.cursor): PostgreSQL cursor
+    """
+    prepared_statements = cursor.connection.prepared_statements
+    if name not in prepared_statements:
+        cursor.execute(
+            sql.SQL("PREPARE {} AS {}").format(sql.Identifier(name), sql.SQL(statement))
+        )
+        prepared_statements.add(name)
+    cursor.execute(sql.SQL("EXECUTE {}").format(sql.Identifier(name)))
+
+
+def format_copy_value(value) -> str:
+    """
+    Formats a value for COPY text format.
+
+    Args:
+        value: Value to format
+
+    Returns:
+        str: Escaped value, or the NULL marker for None
+    """
+    if value is None:
+        return "\\N"
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+def insert_research(records, lookups, cursor) -> dict:
+    """
+    Inserts the research entries for all records.
+
+    The entries are copied into the staging table, inserted in
+    unique-identifier order so concurrent loaders take their locks in the
+    same order, and their IDs read back by joining the staging table.
+    Existing entries are skipped with DO NOTHING rather than rewritten by a
+    no-op DO UPDATE, which would lock and write a new version of every
+    existing row just to make RETURNING emit its ID.
+
+    Args:
+        records (list): List of records to insert
+        lookups (dict): Category and group IDs, as returned by get_lookups
+        cursor (psycopg2.cursor): PostgreSQL cursor
+
+    Returns:
+        dict: Research ID keyed by unique identifier
+
+    Raises:
+        Exception: If a research entry could not be inserted or found
+    """
+    research_rows = {}
+    for record in records:
+        research_rows[record["identifier"]] = (
             record["identifier"],
             record["abstract_url"],
             record["full_text_url"],
             record["abstract"],
             record["title"],
             record["date"],
-            primary_category_id,
-            primary_group_id,
+            get_category_id(
+                record["primary_category"], lookups["categories_by_abbreviation"]
+            ),
+            get_group_id(record["primary_group"], lookups["groups"]),
+        )
+
+    copy_rows(
+        "research_stage",
+        (
+            "unique_identifier",
+            "abstract_url",
+            "full_text_url",
+            "abstract",
+            "title",
+            "date",
+            "primary_category",
+            "primary_group",
         ),
+        sorted(research_rows.values()),
+        cursor,
+    )
+    execute_prepared(
+        "upsert_research",
+        """
+        INSERT INTO research (unique_identifier, abstract_url, full_text_url, abstract, title, date, primary_category, primary_group)
+        SELECT unique_identifier, abstract_url, full_text_url, abstract, title, date, primary_category, primary_group
+        FROM research_stage
+        ORDER BY unique_identifier
+        ON CONFLICT (unique_identifier) DO NOTHING
+        """,
+        cursor,
     )
+    execute_prepared(
+        "select_research_ids",
+        """
+        SELECT research.unique_identifier, research.research_id
+        FROM research JOIN research_stage USING (unique_identifier)
+        """,
+        cursor,
+    )
+    research_ids = dict(cursor.fetchall())
+    if len(research_ids) != len(research_rows):
+        raise Exception("Research record not found and unable to insert.")
+    return research_ids
 
-    research_result = cursor.fetchone()
-    if research_result is None:
-        cursor.execute(
-            "SELECT research_id FROM research WHERE unique_identifier = %s",
-            (record["identifier"],),
-        )
-        research_result = cursor.fetchone()
-        if research_result is None:
-            raise Exception("Research record not found and unable to insert.")
-    research_id = research_result[0]
 
-    for author in record["authors"]:
-        cursor.execute(
-            """
-            INSERT INTO research_authors (last_name, first_name) VALUES (%s, %s)
-            ON CONFLICT (last_name, first_name) DO NOTHING RETURNING author_id
-            """,
-            (author["last_name"], author["first_name"]),
-        )
-        author_result = cursor.fetchone()
-        if author_result is None:
-            cursor.execute(
-                "SELECT author_id FROM research_authors WHERE last_name = %s AND first_name = %s",
-                (author["last_name"], author["first_name"]),
-            )
-            author_result = cursor.fetchone()
-            if author_result is None:
-                raise Exception("Author record not found and unable to insert.")
-        author_id = author_result[0]
+def validate_record(record):
+    """
+    Checks that a record has every field the loader writes.
 
-        cursor.execute(
-            """
-            INSERT INTO research_author (research_id, author_id) VALUES (%s, %s)
-            ON CONFLICT DO NOTHING
-            """,
-            (research_id, author_id),
+    Args:
+        record (dict): Record to validate
+
+    Raises:
+        ValueError: If the record is missing fields
+    """
+    missing = REQUIRED_FIELDS - record.keys()
+    if missing:
+        raise ValueError(
+            f"Record {record.get('identifier')} is missing fields: {sorted(missing)}"
         )
 
-    for category in record["categories"]:
-        cursor.execute(
-            """
-            SELECT category_id FROM categories WHERE name = %s
+
+def insert_authors(records, cursor) -> dict:
+    """
+    Inserts the distinct authors of all records.
+
+    The authors are copied into the staging table, inserted in name order so
+    concurrent loaders take their locks in the same order, and their IDs
+    read back by joining the staging table.
+
+    Args:
+        records (list): List of records whose authors to insert
+        cursor (psycopg2.cursor): PostgreSQL cursor
+
+    Returns:
+        dict: Author ID keyed by (last_name, first_name)
+
+    Raises:
+        Exception: If an author could not be inserted or found
+    """
+    authors = {
+        (author["last_name"], author["first_name"])
+        for record in records
+        for author in record["authors"]
+    }
+
+    copy_rows(
+        "research_authors_stage", ("last_name", "first_name"), sorted(authors), cursor
+    )
+    execute_prepared(
+        "upsert_research_authors",
+        """
+        INSERT INTO research_authors (last_name, first_name)
+        SELECT last_name, first_name FROM research_authors_stage
+        ORDER BY last_name, first_name
+        ON CONFLICT (last_name, first_name) DO NOTHING
+        """,
+        cursor,
+    )
+    execute_prepared(
+        "select_research_author_ids",
+        """
+        SELECT research_authors.last_name, research_authors.first_name, research_authors.author_id
+        FROM research_authors JOIN research_authors_stage USING (last_name, first_name)
         """,
-            (category,),
+        cursor,
+    )
+    author_ids = {
+        (last_name, first_name): author_id
+        for last_name, first_name, author_id in cursor.fetchall()
+    }
+    if len(author_ids) != len(authors):
+        raise Exception("Author record not found and unable to insert.")
+    return author_ids
+
+
+def insert_research_authors(records, research_ids, author_ids, cursor):
+    """
+    Associates the research entries with their authors.
+
+    Args:
+        records (list): List of records to associate
+        research_ids (dict): Research ID keyed by unique identifier
+        author_ids (dict): Author ID keyed by (last_name, first_name)
+        cursor (psycopg2.cursor): PostgreSQL cursor
+    """
+    rows = {
+        (
+            research_ids[record["identifier"]],
+            author_ids[(author["last_name"], author["first_name"])],
         )
-        category_result = cursor.fetchone()
-        if category_result:
-            category_id = category_result[0]
-            cursor.execute(
-                """
-                INSERT INTO research_categories (research_id, category_id) VALUES (%s, %s)
-                ON CONFLICT DO NOTHING
-            """,
-                (research_id, category_id),
-            )
+        for record in records
+        for author in record["authors"]
+    }
+    execute_values(
+        cursor,
+        "INSERT INTO research_author (research_id, author_id) VALUES %s ON CONFLICT DO NOTHING",
+        sorted(rows),
+        template="(%s, %s)",
+        page_size=ASSOCIATION_PAGE_SIZE,
+    )
 
-    for group in record["groups"]:
-        cursor.execute(
-            """
-            SELECT group_id FROM groups WHERE label = %s
+
+def insert_research_categories(records, research_ids, cursor):
+    """
+    Associates the research entries with their known categories.
+
+    Category names are resolved to IDs by the database in the same
+    statement, so the whole batch takes a single round trip.
+
+    Args:
+        records (list): List of records to associate
+        research_ids (dict): Research ID keyed by unique identifier
+        cursor (psycopg2.cursor): PostgreSQL cursor
+    """
+    pairs = {
+        (research_ids[record["identifier"]], category)
+        for record in records
+        for category in record["categories"]
+    }
+    cursor.execute(
+        """
+        INSERT INTO research_categories (research_id, category_id)
+        SELECT DISTINCT pairs.research_id, categories.category_id
+        FROM unnest(%s::int[], %s::text[]) AS pairs (research_id, name)
+        JOIN categories ON categories.name = pairs.name
+        ORDER BY pairs.research_id, categories.category_id
+        ON CONFLICT DO NOTHING
         """,
-            (group,),
-        )
-        group_result = cursor.fetchone()
-        if group_result:
-            group_id = group_result[0]
-            cursor.execute(
-                """
-                INSERT INTO research_groups (research_id, group_id) VALUES (%s, %s)
-                ON CONFLICT DO NOTHING
-            """,
-                (research_id, group_id),
-            )
+        ([pair[0] for pair in pairs], [pair[1] for pair in pairs]),
+    )
+
+
+def insert_research_groups(records, research_ids, cursor):
+    """
+    Associates the research entries with their known groups.
+
+    Group labels are resolved to IDs by the database in the same statement,
+    so the whole batch takes a single round trip.
 
-    cursor.execute("COMMIT")
+    Args:
+        records (list): List of records to associate
+        research_ids (dict): Research ID keyed by unique identifier
+        cursor (psycopg2.cursor): PostgreSQL cursor
+    """
+    pairs = {
+        (research_ids[record["identifier"]], group)
+        for record in records
+        for group in record["groups"]
+    }
+    cursor.execute(
+        """
+        INSERT INTO research_groups (research_id, group_id)
+        SELECT DISTINCT pairs.research_id, groups.group_id
+        FROM unnest(%s::int[], %s::text[]) AS pairs (research_id, label)
+        JOIN groups ON groups.label = pairs.label
+        ORDER BY pairs.research_id, groups.group_id
+        ON CONFLICT DO NOTHING
+        """,
+        ([pair[0] for pair in pairs], [pair[1] for pair in pairs]),
+    )
@@ -1,22 +1,83 @@
 """ This module is responsible for parsing arXiv daily summaries and extracting relevant data. """
 
-from collections import defaultdict
-import json
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from itertools import chain
+import gzip
+import io
 import logging
 import os
-from typing import List, Dict, Union, Tuple
+import re
+from typing import BinaryIO, Iterator, List, Dict, Optional, Union, Tuple
 
 import boto3
-import xml.etree.ElementTree as ET
+from boto3.s3.transfer import TransferConfig
 from botocore.client import BaseClient
+from botocore.config import Config
 from botocore.exceptions import NoCredentialsError, PartialCredentialsError
+from lxml import etree
+
+try:
+    import orjson
+except ImportError:
+    import json as orjson
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
 
 CATEGORIES = "categories"
 LABEL = "label"
 SEPARATOR = "separator"
 QUERY_TERM = "query_term"
 
-logging.getLogger().setLevel(logging.INFO)
+NAMESPACES = {
+    "oai": "http://www.openarchives.org/OAI/2.0/",
+    "oai_dc": "http://www.openarchives.org/OAI/2.0/oai_dc/",
+    "dc": "http://purl.org/dc/elements/1.1/",
+}
+OAI_TAG_PREFIX = f"{{{NAMESPACES['oai']}}}"
+DC_TAG_PREFIX = f"{{{NAMESPACES['dc']}}}"
+RECORD_TAG = f"{OAI_TAG_PREFIX}record"
+HEADER_IDENTIFIER_TAG = f"{OAI_TAG_PREFIX}identifier"
+DC_IDENTIFIER_TAG = f"{DC_TAG_PREFIX}identifier"
+DC_TITLE_TAG = f"{DC_TAG_PREFIX}title"
+DC_DESCRIPTION_TAG = f"{DC_TAG_PREFIX}description"
+DC_DATE_TAG = f"{DC_TAG_PREFIX}date"
+DC_CREATOR_TAG = f"{DC_TAG_PREFIX}creator"
+DC_SUBJECT_TAG = f"{DC_TAG_PREFIX}subject"
+REQUIRED_FIELD_TAGS = frozenset(
+    {
+        HEADER_IDENTIFIER_TAG,
+        DC_IDENTIFIER_TAG,
+        DC_DESCRIPTION_TAG,
+        DC_TITLE_TAG,
+        DC_DATE_TAG,
+    }
+)
+RECORD_FIELDS_XPATH = etree.XPath(
+    "oai:header/oai:identifier | oai:metadata/oai_dc:dc/dc:*", namespaces=NAMESPACES
+)
+PARSER_WORKERS = int(os.environ.get("S3_PARALLELISM", "16"))
+RANGED_GET_THRESHOLD = 16 * 1024 * 1024
+RANGED_GET_SIZE = 8 * 1024 * 1024
+RANGED_GET_CONCURRENCY = 4
+MULTIPART_THRESHOLD = 8 * 1024 * 1024
+TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=MULTIPART_THRESHOLD,
+    multipart_chunksize=MULTIPART_THRESHOLD,
+    max_concurrency=RANGED_GET_CONCURRENCY,
+    use_threads=True,
+)
+DISALLOWED_BYTES = bytes(
+    byte for byte in range(256) if byte not in (10, 13) and not 32 <= byte <= 126
+)
+
+logging.getLogger().setLevel(os.environ.get("LOG_LEVEL", "INFO"))
+
+_s3_client = None
 
 
 def load_config() -> Dict[str, Union[str, Dict[str, str]]]:
@@ -308,13 +369,29 @@ GROUP_PREFIX_MAPPING = {
 }
 
 
+GROUP_PREFIX_PATTERN = re.compile(
+    "|".join(map(re.escape, sorted(GROUP_PREFIX_MAPPING, key=len, reverse=True)))
+)
+
 CONFIG = load_config()
+SUBJECT_INDEX = {
+    full_name: (group[LABEL], abbreviation)
+    for group in CONFIG.values()
+    if isinstance(group, dict)
+    for full_name, abbreviation in group[CATEGORIES].items()
+}
+BUCKET_NAME = CONFIG["bucket_name"]
+SAVE_PATH = CONFIG["save_path"]
+INPUT_KEY_PREFIX = "arxiv/"
 
 
 def lambda_handler(event: dict, context) -> dict:
     """
     The main entry point for the Lambda function.
 
+    Every object in the event is processed, up to PARSER_WORKERS at a time,
+    so the S3 round trips of one object overlap with work on the others.
+
     Args:
         event (dict): The event data.
         context: The context data.
@@ -322,28 +399,26 @@ def lambda_handler(event: dict, context) -> dict:
     Returns:
         dict: A dict with the status code and body.
     """
-    logging.info(f"Received event: {event}")
+    logging.info("Received event: %s", event)
     logging.info("Starting to parse arXiv daily summaries")
     try:
-        s3 = boto3.client("s3")
-        bucket = event["Records"][0]["s3"]["bucket"]["name"]
-        key = event["Records"][0]["s3"]["object"]["key"]
-        logging.info(
-            f"Processing arXiv daily summaries for bucket: {bucket}, key: {key}"
-        )
+        s3 = get_s3_client()
+        objects = [
+            (record["s3"]["bucket"]["name"], record["s3"]["object"]["key"])
+            for record in event["Records"]
+        ]
     except KeyError as e:
-        logging.error(f"Malformed event: {event}. Missing key: {e}")
+        logging.error("Malformed event: %s. Missing key: %s", event, e)
         return {"statusCode": 400, "body": "Malformed event"}
 
-    try:
-        logging.info(f"Fetching S3 object for bucket: {bucket}, key: {key}")
-        xml_data = fetch_s3_object(s3, bucket, key)
-        logging.info(f"Fetched S3 object for bucket: {bucket}, key: {key}")
-        extracted_data_chunk = parse_xml_data(xml_data)
-        logging.info(f"Parsed XML data for bucket: {bucket}, key: {key}")
-        upload_to_s3(s3, extracted_data_chunk, key)
-    except Exception as e:
-        logging.error(f"Error in Lambda handler: {str(e)}")
+    if not objects:
+        logging.error("Malformed event: %s. No records.", event)
+        return {"statusCode": 400, "body": "Malformed event"}
+
+    with ThreadPoolExecutor(max_workers=min(PARSER_WORKERS, len(objects))) as executor:
+        results = list(executor.map(lambda obj: process_s3_object(s3, *obj), objects))
+
+    if not all(results):
         return {"statusCode": 500, "body": "Failed to parse arXiv daily summaries"}
 
     logging.info("Successfully parsed arXiv daily summaries.")
@@ -351,9 +426,33 @@ def lambda_handler(event: dict, context) -> dict:
     return {"statusCode": 200, "body": "Successfully parsed arXiv daily summaries"}
 
 
-def fetch_s3_object(client: BaseClient, bucket: str, key: str) -> str:
+def get_s3_client() -> BaseClient:
     """
-    Fetches an S3 object.
+    Gets the S3 client, created once per container and reused by warm
+    invocations.
+
+    The connection pool is sized for every concurrent request the handler
+    can make, so pooled connections are kept alive rather than discarded.
+
+    Returns:
+        BaseClient: The S3 client.
+    """
+    global _s3_client
+    if _s3_client is None:
+        _s3_client = boto3.client(
+            "s3",
+            config=Config(
+                tcp_keepalive=True,
+                max_pool_connections=PARSER_WORKERS * (RANGED_GET_CONCURRENCY + 1),
+                retries={"mode": "standard"},
+            ),
+        )
+    return _s3_client
+
+
+def process_s3_object(client: BaseClient, bucket: str, key: str) -> bool:
+    """
+    Parses an arXiv daily summary object and uploads the extracted data.
 
     Args:
         client (BaseClient): The S3 client.
@@ -361,13 +460,26 @@ def fetch_s3_object(client: BaseClient, bucket: str, key: str) -> str:
         key (str): The key of the object.
 
     Returns:
-        str: The object data.
+        bool: True if the object was processed, False otherwise.
     """
-    response = fetch_raw_object(client, bucket, key)
-    sanitized_data = sanitize_object_data(
-        response["Body"].read().decode("utf-8").strip()
+    logging.info(
+        "Processing arXiv daily summaries for bucket: %s, key: %s", bucket, key
     )
-    return decode_s3_object(sanitized_data, key)
+    try:
+        response = fetch_raw_object(client, bucket, key)
+        stream = open_object_stream(client, bucket, key, response)
+        try:
+            extracted_data_chunk = parse_xml_data(
+                SanitizingReader(decode_object_stream(stream, response))
+            )
+        finally:
+            stream.close()
+        logging.info("Parsed XML data for bucket: %s, key: %s", bucket, key)
+        upload_to_s3(client, extracted_data_chunk, key)
+    except Exception as e:
+        logging.error("Error processing bucket: %s, key: %s: %s", bucket, key, e)
+        return False
+    return True
 
 
 def fetch_raw_object(client: BaseClient, bucket: str, key: str) -> dict:
@@ -395,6 +507,140 @@ def fetch_raw_object(client: BaseClient, bucket: str, key: str) -> dict:
         raise
 
 
+def open_object_stream(
+    client: BaseClient, bucket: str, key: str, response: dict
+) -> BinaryIO:
+    """
+    Opens a readable stream over a fetched S3 object.
+
+    Objects over RANGED_GET_THRESHOLD are read with parallel byte-range GETs,
+    as a single GET is limited by the throughput of one connection.
+
+    Args:
+        client (BaseClient): The S3 client.
+        bucket (str): The bucket name.
+        key (str): The key of the object.
+        response (dict): The GetObject response for the object.
+
+    Returns:
+        BinaryIO: The object stream.
+    """
+    if response["ContentLength"] > RANGED_GET_THRESHOLD:
+        return RangedObjectReader(client, bucket, key, response)
+    return response["Body"]
+
+
+def decode_object_stream(stream: BinaryIO, response: dict) -> BinaryIO:
+    """
+    Decodes an object stream according to the object's ContentEncoding.
+
+    The fetcher stores gzipped XML; objects without an encoding are read
+    as-is.
+
+    Args:
+        stream (BinaryIO): The object stream.
+        response (dict): The GetObject response for the object.
+
+    Returns:
+        BinaryIO: The decoded stream.
+    """
+    if response.get("ContentEncoding") == "gzip":
+        return gzip.GzipFile(fileobj=stream, mode="rb")
+    return stream
+
+
+class RangedObjectReader:
+    """
+    Read-only file-like view of a large S3 object.
+
+    The first RANGED_GET_SIZE bytes come from the body of the initial GET.
+    The rest of the object is fetched as byte ranges, up to
+    RANGED_GET_CONCURRENCY of them ahead of the reader, with an ETag
+    condition so every range comes from the same version of the object.
+    """
+
+    def __init__(self, client: BaseClient, bucket: str, key: str, response: dict):
+        self._client = client
+        self._bucket = bucket
+        self._key = key
+        self._etag = response["ETag"]
+        self._body = response["Body"]
+        self._body_remaining = RANGED_GET_SIZE
+        size = response["ContentLength"]
+        self._ranges = iter(
+            (start, min(start + RANGED_GET_SIZE, size) - 1)
+            for start in range(RANGED_GET_SIZE, size, RANGED_GET_SIZE)
+        )
+        self._executor = ThreadPoolExecutor(max_workers=RANGED_GET_CONCURRENCY)
+        self._pending = deque()
+        for _ in range(RANGED_GET_CONCURRENCY):
+            self._fetch_next_range()
+        self._buffer = b""
+        self._offset = 0
+
+    def _fetch_next_range(self) -> None:
+        byte_range = next(self._ranges, None)
+        if byte_range is not None:
+            self._pending.append(self._executor.submit(self._fetch_range, *byte_range))
+
+    def _fetch_range(self, start: int, end: int) -> bytes:
+        response = self._client.get_object(
+            Bucket=self._bucket,
+            Key=self._key,
+            Range=f"bytes={start}-{end}",
+            IfMatch=self._etag,
+        )
+        return response["Body"].read()
+
+    def read(self, size: int = -1) -> bytes:
+        """
+        Reads data.
+
+        Args:
+            size (int): The maximum number of bytes to read, or -1 to read to
+                the end of the object.
+
+        Returns:
+            bytes: The data, or b"" at the end of the object.
+        """
+        if size < 0:
+            return b"".join(iter(lambda: self.read(RANGED_GET_SIZE), b""))
+        if size == 0:
+            return b""
+
+        if self._body is not None:
+            amount = min(size, self._body_remaining)
+            data = self._body.read(amount) if amount else b""
+            if data:
+                self._body_remaining -= len(data)
+                return data
+            self._body.close()
+            self._body = None
+
+        if self._offset >= len(self._buffer):
+            if not self._pending:
+                return b""
+            self._buffer = self._pending.popleft().result()
+            self._offset = 0
+            self._fetch_next_range()
+
+        data = self._buffer[self._offset : self._offset + size]
+        self._offset += len(data)
+        return data
+
+    def close(self) -> None:
+        """
+        Closes the initial body and cancels any range fetches still pending.
+        """
+        if self._body is not None:
+            self._body.close()
+            self._body = None
+        for future in self._pending:
+            future.cancel()
+        self._pending.clear()
+        self._executor.shutdown(wait=False)
+
+
 def log_error(message: str, error: str):
     """
     Logs an error.
@@ -403,44 +649,67 @@ def log_error(message: str, error: str):
         message (str): The error message.
         error (str): The error.
     """
-    logging.error(f"{message}: {error}")
+    logging.error("%s: %s", message, error)
 
 
-def sanitize_object_data(raw_data: str) -> str:
+def sanitize_object_data(raw_data: bytes) -> bytes:
     """
-    Sanitizes object data.
+    Sanitizes object data, keeping only printable ASCII, newlines and
+    carriage returns.
+
+    Every byte of a multi-byte UTF-8 sequence is non-ASCII, so filtering the
+    raw bytes drops the same characters as decoding first would, without
+    the decoder pass over them.
 
     Args:
-        raw_data (str): The raw data.
+        raw_data (bytes): The raw data.
 
     Returns:
-        str: The sanitized data.
+        bytes: The sanitized data.
     """
-    return "".join(ch for ch in raw_data if ch in {"\n", "\r"} or 32 <= ord(ch) <= 126)
+    return raw_data.translate(None, DISALLOWED_BYTES)
 
 
-def decode_s3_object(data_str: str, key: str) -> Union[str, List[str]]:
+class SanitizingReader:
+    """
+    Read-only file-like wrapper that sanitizes a byte stream as it is read,
+    so an S3 body can be fed to the XML parser without being read in full.
+    Leading whitespace is dropped, as the XML declaration must come first.
     """
-    Decodes S3 object data.
 
-    Args:
-        data_str (str): The data string.
-        key (str): The key of the object.
+    def __init__(self, stream: BinaryIO):
+        self._stream = stream
+        self._started = False
 
-    Returns:
-        Union[str, List[str]]: The decoded data.
-    """
-    if not data_str:
-        logging.warning(f"Empty data received for key: {key}")
-        return ""
+    def read(self, size: int = -1) -> bytes:
+        """
+        Reads sanitized data.
 
-    logging.info(f"First few characters of data for key {key}: {data_str[:50]}")
-    return data_str
+        Args:
+            size (int): The maximum number of raw bytes to read.
+
+        Returns:
+            bytes: The sanitized data, or b"" at the end of the stream.
+        """
+        while True:
+            chunk = self._stream.read(size)
+            if not chunk:
+                return b""
+            data = sanitize_object_data(chunk)
+            if not self._started:
+                data = data.lstrip()
+            if data:
+                self._started = True
+                return data
 
 
 def upload_to_s3(client: BaseClient, data: dict, key: str) -> None:
     """
-    Uploads data to S3.
+    Uploads data to S3 as compressed JSON.
+
+    The JSON is compressed with zstd when zstandard is installed and with
+    gzip otherwise; the object's ContentEncoding says which. Bodies over
+    MULTIPART_THRESHOLD are uploaded in parallel parts.
 
     Args:
         client (BaseClient): The S3 client.
@@ -451,244 +720,261 @@ def upload_to_s3(client: BaseClient, data: dict, key: str) -> None:
         logging.warning("No data to upload.")
         return
 
-    save_path = CONFIG.get("save_path")
-    if save_path is None:
+    if SAVE_PATH is None:
         logging.error("save_path is None in config.")
         return
 
-    bucket_name = CONFIG.get("bucket_name")
-    object_name = f"{save_path}/{key.replace('arxiv/', '')}-parsed.json"
+    object_name = f"{SAVE_PATH}/{key.removeprefix(INPUT_KEY_PREFIX)}-parsed.json"
+    body = orjson.dumps(data)
+    if isinstance(body, str):
+        body = body.encode("utf-8")
+    if zstandard is not None:
+        body = zstandard.ZstdCompressor(level=3).compress(body)
+        content_encoding = "zstd"
+    else:
+        body = gzip.compress(body, compresslevel=1)
+        content_encoding = "gzip"
 
     try:
-        client.put_object(
-            Body=json.dumps(data),
-            Bucket=bucket_name,
-            Key=object_name,
-            ContentType="application/json",
-        )
+        if len(body) > MULTIPART_THRESHOLD:
+            client.upload_fileobj(
+                io.BytesIO(body),
+                BUCKET_NAME,
+                object_name,
+                Config=TRANSFER_CONFIG,
+                ExtraArgs={
+                    "ContentType": "application/json",
+                    "ContentEncoding": content_encoding,
+                },
+            )
+        else:
+            client.put_object(
+                Body=body,
+                Bucket=BUCKET_NAME,
+                Key=object_name,
+                ContentType="application/json",
+                ContentEncoding=content_encoding,
+            )
     except Exception as e:
-        logging.error(f"Failed to upload to S3: {e}")
+        logging.error("Failed to upload to S3: %s", e)
 
 
-def parse_xml_data(xml_data: str) -> dict:
+def parse_xml_data(xml_stream: BinaryIO) -> dict:
     """
     Parses XML data.
 
     Args:
-        xml_data (str): The XML data.
+        xml_stream (BinaryIO): The XML data, as a readable binary stream.
 
     Returns:
         dict: The parsed data.
     """
-    if not validate_xml_data(xml_data):
-        return {}
-
-    root, ns = parse_and_get_root(xml_data)
-    if root is None or not validate_namespaces(xml_data, ns):
+    try:
+        return extract_data_from_records(iter_records(xml_stream))
+    except etree.XMLSyntaxError as e:
+        logging.error("Failed to parse XML: %s", e)
         return {}
 
-    return extract_data_from_records(root, ns)
-
 
-def validate_xml_data(xml_data: str) -> bool:
+def iter_records(xml_stream: BinaryIO) -> Iterator[etree._Element]:
     """
-    Validates XML data.
+    Parses XML data incrementally, yielding one record element at a time.
 
-    Args:
-        xml_data (str): The XML data.
+    Each record is cleared, and detached from the document, once the caller
+    asks for the next one, so only a single record is held in memory. Once
+    the document is parsed, its root's namespace declarations are checked
+    so a document that is not an OAI-PMH response is reported as such.
 
-    Returns:
-        bool: True if the data is valid, False otherwise.
-    """
-    if not xml_data:
-        logging.warning("Received empty or None XML data.")
-        return False
-    return True
+    Whitespace-only text between elements, comments and processing
+    instructions are dropped by the parser before they become nodes, and
+    entities are not resolved.
 
+    Args:
+        xml_stream (BinaryIO): The XML data, as a readable binary stream.
 
-def parse_and_get_root(xml_data: str) -> tuple:
-    """
-    Parses XML data and returns the root and namespaces.
+    Yields:
+        etree._Element: The record element.
 
-    Args:
-        xml_data (str): The XML data.
+    Raises:
+        etree.XMLSyntaxError: If the XML data is malformed.
+    """
+    context = etree.iterparse(
+        xml_stream,
+        events=("end",),
+        tag=RECORD_TAG,
+        remove_blank_text=True,
+        remove_comments=True,
+        remove_pis=True,
+        resolve_entities=False,
+    )
+    for _, record in context:
+        yield record
+        record.clear()
+        while record.getprevious() is not None:
+            del record.getparent()[0]
 
-    Returns:
-        tuple: The root and namespaces.
-    """
-    try:
-        root = ET.fromstring(xml_data)
-    except ET.ParseError as e:
-        logging.error(f"Failed to parse XML: {e}")
-        return None, {}
-
-    ns = {
-        "oai": "http://www.openarchives.org/OAI/2.0/",
-        "dc": "http://purl.org/dc/elements/1.1/",
-    }
-    return root, ns
+    if NAMESPACES["oai"] not in context.root.nsmap.values():
+        logging.warning("Namespaces are not as expected.")
 
 
-def validate_namespaces(xml_data: str, ns: dict) -> bool:
+def extract_data_from_records(records: Iterator[etree._Element]) -> dict:
     """
-    Validates namespaces.
+    Extracts data from records.
 
     Args:
-        xml_data (str): The XML data.
-        ns (dict): The namespaces.
+        records (Iterator[etree._Element]): The record elements.
 
     Returns:
-        bool: True if the namespaces are valid, False otherwise.
+        dict: A dict with the extracted records, or an empty dict if no
+        record could be extracted.
     """
-    if not all(namespace in xml_data for namespace in ns.values()):
-        logging.warning("Namespaces are not as expected.")
-        return False
-    return True
+    first_record = next(records, None)
+    if first_record is None:
+        logging.warning("No records found in XML.")
+        return {}
+
+    extracted_records = [
+        record_data
+        for record_data in map(extract_record_data, chain((first_record,), records))
+        if record_data
+    ]
+    return {"records": extracted_records} if extracted_records else {}
 
 
-def extract_data_from_records(root, ns: dict) -> dict:
+def extract_record_fields(record) -> Dict[str, List[str]]:
     """
-    Extracts data from records.
+    Collects the header identifier and Dublin Core fields of a record with a
+    single XPath evaluation.
+
+    Elements without text are left out, so an empty required element counts
+    as missing.
 
     Args:
-        root (ET.Element): The root element.
-        ns (dict): A dict of namespaces.
+        record (etree._Element): The record element.
 
     Returns:
-        dict: A dict with extracted data.
+        Dict[str, List[str]]: The field texts, in document order, keyed by
+        qualified tag.
     """
-    extracted_data_chunk = defaultdict(list)
-    records = root.findall(".//oai:record", ns)
-
-    if not records:
-        logging.warning("No records found in XML.")
-        return {}
+    fields = {}
+    for element in RECORD_FIELDS_XPATH(record):
+        if element.text:
+            fields.setdefault(element.tag, []).append(element.text)
+    return fields
 
-    for record in records:
-        date_elements = record.findall(".//dc:date", ns)
-        if len(date_elements) != 1:
-            logging.info("Record skipped due to multiple or zero date elements.")
-            continue
-        extracted_data_chunk["records"].append(extract_record_data(record, ns))
 
-    return extracted_data_chunk
-
-
-def extract_record_data(record, ns: dict) -> dict:
+def extract_record_data(record) -> dict:
     """
     Extracts relevant data from an arXiv research summary record.
 
     Args:
-        record (ET.Element): The record element.
-        ns (dict): A dict of namespaces.
+        record (etree._Element): The record element.
 
     Returns:
-        dict: A dict with extracted data.
-    """
-    identifier = record.find(".//oai:identifier", ns)
-    abstract_url = record.find(".//dc:identifier", ns)
-    full_text_url = ""
-    if abstract_url is not None:
-        full_text_url = abstract_url.text.replace("/abs/", "/pdf/")
-    authors = extract_authors(record, ns)
-    logging.info(f"Extracted authors for record: {identifier.text}")
-    groups, categories = extract_categories_and_groups(record, ns)
-    logging.info(f"Extracted categories for record: {identifier.text}")
-    groups = [group for group in groups if group]
-    categories = [category for category in categories if category]
-    primary_group = groups[0] if groups else ""
-    primary_category = categories[0] if categories else ""
-    abstract = record.find(".//dc:description", ns)
-    title = record.find(".//dc:title", ns)
-    date = record.find(".//dc:date", ns)
-    logging.info(f"Extracted data for record: {identifier.text}")
-    if any(el is None for el in [identifier, abstract_url, abstract, title, date]):
+        dict: A dict with extracted data, or an empty dict if the record is
+        skipped.
+    """
+    fields = extract_record_fields(record)
+    if len(fields.get(DC_DATE_TAG, ())) != 1:
+        logging.debug("Record skipped due to multiple or zero date elements.")
+        return {}
+    if not REQUIRED_FIELD_TAGS.issubset(fields):
         logging.warning("Missing essential elements in record. Skipping.")
         return {}
 
+    identifier = fields[HEADER_IDENTIFIER_TAG][0]
+    abstract_url = fields[DC_IDENTIFIER_TAG][0]
+    authors = extract_authors(fields.get(DC_CREATOR_TAG, []))
+    groups, categories = extract_categories_and_groups(fields.get(DC_SUBJECT_TAG, []))
+    logging.debug("Extracted data for record: %s", identifier)
+
     return {
-        "identifier": identifier.text,
-        "abstract_url": abstract_url.text,
-        "full_text_url": full_text_url,
+        "identifier": identifier,
+        "abstract_url": abstract_url,
+        "full_text_url": abstract_url.replace("/abs/", "/pdf/"),
         "authors": authors,
-        "primary_category": primary_category,
+        "primary_category": categories[0] if categories else "",
         "categories": categories,
-        "abstract": abstract.text,
-        "title": title.text,
-        "date": date.text,
-        "primary_group": primary_group,
+        "abstract": fields[DC_DESCRIPTION_TAG][0],
+        "title": fields[DC_TITLE_TAG][0],
+        "date": fields[DC_DATE_TAG][0],
+        "primary_group": groups[0] if groups else "",
         "groups": groups,
     }
 
 
-def extract_authors(record, ns: dict) -> list:
+def extract_authors(creators: List[str]) -> list:
     """
-    Extracts authors from an arXiv research summary record.
+    Extracts authors from the creators of an arXiv research summary record.
 
     Args:
-        record (ET.Element): The record element.
-        ns (dict): A dict of namespaces.
+        creators (List[str]): The dc:creator texts.
 
     Returns:
         list: A list of authors.
     """
-    creators_elements = record.findall(".//dc:creator", ns)
-    return [
-        {
-            "last_name": name.text.split(", ", 1)[0],
-            "first_name": name.text.split(", ", 1)[1]
-            if len(name.text.split(", ", 1)) > 1
-            else "",
-        }
-        for name in creators_elements
-        if name.text
-    ]
+    authors = []
+    for name in creators:
+        if name:
+            last_name, _, first_name = name.partition(", ")
+            authors.append({"last_name": last_name, "first_name": first_name})
+    return authors
 
 
-def extract_categories_and_groups(record, ns: dict) -> Tuple[List[str], List[str]]:
+def extract_categories_and_groups(subjects: List[str]) -> Tuple[List[str], List[str]]:
     """
-    Extracts categories and groups from an arXiv research summary record.
+    Extracts categories and groups from the subjects of an arXiv research
+    summary record.
 
     Args:
-        record (ET.Element): The record element.
-        ns (dict): A dict of namespaces.
+        subjects (List[str]): The dc:subject texts.
 
     Returns:
         Tuple[List[str], List[str]]: A tuple of lists of categories and groups.
     """
-    subjects_elements = record.findall(".//dc:subject", ns)
-    matched_categories = []
-    matched_groups = []
+    matched_categories: Dict[str, None] = {}
+    matched_groups: Dict[str, None] = {}
 
-    for subject_element in subjects_elements:
-        subject_text = subject_element.text
+    for subject_text in subjects:
         if subject_text:
-            for prefix, group in GROUP_PREFIX_MAPPING.items():
-                if prefix in subject_text:
-                    category_mapping = CONFIG.get(group, {}).get("categories", {})
-                    matched_category = next(
-                        (
-                            abbr
-                            for full, abbr in category_mapping.items()
-                            if subject_text == full
-                        ),
-                        None,
-                    )
-                    if matched_category and matched_category not in matched_categories:
-                        matched_categories.append(matched_category)
-                    if group not in matched_groups:
-                        matched_groups.append(group)
-                    break
-            else:
-                logging.info(f"No match found for: {subject_text}")
-
-    if not matched_categories:
-        matched_categories.append("Unknown")
-
-    if not matched_groups:
-        matched_groups.append("Unknown")
-
-    return matched_groups, matched_categories
+            match = match_subject(subject_text)
+            if match is None:
+                logging.debug("No match found for: %s", subject_text)
+                continue
+            group, matched_category = match
+            if matched_category:
+                matched_categories.setdefault(matched_category)
+            matched_groups.setdefault(group)
+
+    return list(matched_groups) or ["Unknown"], list(matched_categories) or ["Unknown"]
+
+
+@lru_cache(maxsize=1024)
+def match_subject(subject_text: str) -> Optional[Tuple[str, Optional[str]]]:
+    """
+    Matches a subject to its group and category abbreviation.
+
+    Configured categories are found by their full name in SUBJECT_INDEX.
+    Any other subject is matched to a group, without a category, by the
+    longest group name it starts with.
+    Results are cached, as the same few subjects repeat across every record
+    of a file.
+
+    Args:
+        subject_text (str): The dc:subject text.
+
+    Returns:
+        Optional[Tuple[str, Optional[str]]]: The group and the category
+        abbreviation, which is None for categories not in the configuration,
+        or None if no group matches.
+    """
+    match = SUBJECT_INDEX.get(subject_text)
+    if match is not None:
+        return match
+    prefix = GROUP_PREFIX_PATTERN.match(subject_text)
+    if prefix is None:
+        return None
+    return GROUP_PREFIX_MAPPING[prefix.group()], None
 
 
 if __name__ == "__main__":
@@ -1,69 +1,270 @@
-import datetime
-from unittest.mock import patch, Mock
+from datetime import date, datetime
+import gzip
+import os
+from unittest.mock import patch, MagicMock
 
+from botocore.exceptions import ClientError
+import psycopg2
 import pytest
-import xml.etree.ElementTree as ET
 
-import src.arxiv_fetch_daily_summaries as arxiv_fetch_daily_summaries
+from data_ingestion_service.lambdas.arxiv_fetch_daily_summaries.src import arxiv_fetch_daily_summaries
 
 
-"""@pytest.mark.parametrize("event, expected_status_code, expected_body", [
-    ({"base_url": "http://test.com", "bucket_name": "test_bucket", "from_date": (datetime.datetime.today() - datetime.timedelta(days=1)), "summary_set": "test_set"}, 200, "Successfully fetched arXiv daily summaries from 2022-01-01"),
-    ({}, 200, "Successfully fetched arXiv daily summaries from None"),
+def test_insert_fetch_statuses():
+    cursor = MagicMock()
+    with patch.object(arxiv_fetch_daily_summaries, "execute_values") as mock_execute_values:
+        arxiv_fetch_daily_summaries.insert_fetch_statuses(["2023-10-26", "2023-10-27"], cursor)
+        args, kwargs = mock_execute_values.call_args
+        assert args[0] is cursor
+        assert "ON CONFLICT (fetch_date) DO NOTHING" in args[1]
+        assert args[2] == [("2023-10-26",), ("2023-10-27",)]
+        assert kwargs["template"] == "(%s, 'pending')"
+
+
+def test_set_fetch_statuses():
+    cursor = MagicMock()
+    fetch_statuses = [("2023-10-26", "success"), ("2023-10-27", "failure")]
+    with patch.object(arxiv_fetch_daily_summaries, "execute_values") as mock_execute_values:
+        arxiv_fetch_daily_summaries.set_fetch_statuses(fetch_statuses, cursor)
+        args, _ = mock_execute_values.call_args
+        assert args[0] is cursor
+        assert args[2] == fetch_statuses
+
+
+@pytest.fixture
+def fetch_status_cursor():
+    dsn = os.environ.get("TEST_DATABASE_DSN")
+    if not dsn:
+        pytest.skip("TEST_DATABASE_DSN is not set")
+    conn = psycopg2.connect(dsn)
+    cursor = conn.cursor()
+    cursor.execute(
+        "CREATE TEMP TABLE research_fetch_status (fetch_date DATE PRIMARY KEY, status VARCHAR(50) NOT NULL, "
+        "retry_count INT NOT NULL DEFAULT 0)"
+    )
+    yield cursor
+    conn.rollback()
+    conn.close()
+
+
+def fetch_status_rows(cursor):
+    cursor.execute("SELECT fetch_date::TEXT, status, retry_count FROM research_fetch_status ORDER BY fetch_date")
+    return cursor.fetchall()
+
+
+def test_fetch_statuses_in_database(fetch_status_cursor):
+    dates = ["2023-10-26", "2023-10-27", "2023-10-28"]
+    arxiv_fetch_daily_summaries.insert_fetch_statuses(dates, fetch_status_cursor)
+    arxiv_fetch_daily_summaries.insert_fetch_statuses(dates[:1], fetch_status_cursor)
+    assert fetch_status_rows(fetch_status_cursor) == [(date, "pending", 0) for date in dates]
+
+    arxiv_fetch_daily_summaries.set_fetch_statuses([("2023-10-26", "success"), ("2023-10-27", "failure")],
+                                                   fetch_status_cursor)
+    arxiv_fetch_daily_summaries.set_fetch_statuses([("2023-10-27", "failure")], fetch_status_cursor)
+    assert fetch_status_rows(fetch_status_cursor) == [
+        ("2023-10-26", "success", 0),
+        ("2023-10-27", "failure", 2),
+        ("2023-10-28", "pending", 0),
+    ]
+
+
+def test_upload_to_s3():
+    mock_s3 = MagicMock()
+    with patch.object(arxiv_fetch_daily_summaries, "get_s3_client", return_value=mock_s3):
+        arxiv_fetch_daily_summaries.upload_to_s3("test_bucket", "2022-01-01", "test_set", [b"<xml>1</xml>", b"<xml>2</xml>"])
+    calls = sorted(mock_s3.put_object.call_args_list, key=lambda call: call.kwargs["Key"])
+    assert [call.kwargs["Key"] for call in calls] == ["arxiv/test_set-2022-01-01-0.xml", "arxiv/test_set-2022-01-01-1.xml"]
+    assert gzip.decompress(calls[0].kwargs["Body"]) == b"<xml>1</xml>"
+    assert calls[0].kwargs["Bucket"] == "test_bucket"
+    assert calls[0].kwargs["ContentEncoding"] == "gzip"
+    assert calls[0].kwargs["IfNoneMatch"] == "*"
+
+
+def test_upload_to_s3_skips_existing_objects():
+    mock_s3 = MagicMock()
+    mock_s3.put_object.side_effect = ClientError({"Error": {"Code": "PreconditionFailed"}}, "PutObject")
+    with patch.object(arxiv_fetch_daily_summaries, "get_s3_client", return_value=mock_s3):
+        arxiv_fetch_daily_summaries.upload_to_s3("test_bucket", "2022-01-01", "test_set", [b"<xml></xml>"])
+    mock_s3.put_object.assert_called_once()
+
+
+def make_oai_response(records, resumption_token=None):
+    metadata = "".join(
+        "<record><header><identifier>oai:arXiv.org:{}</identifier></header><metadata>"
+        "<oai_dc:dc xmlns:oai_dc='http://www.openarchives.org/OAI/2.0/oai_dc/' xmlns:dc='http://purl.org/dc/elements/1.1/'>"
+        "<dc:title>Title</dc:title><dc:description>Abstract</dc:description>{}"
+        "</oai_dc:dc></metadata></record>".format(number, fields)
+        for number, fields in enumerate(records)
+    )
+    token = "" if resumption_token is None else f"<resumptionToken>{resumption_token}</resumptionToken>"
+    return (f"<OAI-PMH xmlns='http://www.openarchives.org/OAI/2.0/'><ListRecords>{metadata}{token}"
+            "</ListRecords></OAI-PMH>").encode()
+
+
+@pytest.mark.parametrize("resumption_token, expected", [("6960524|1001", "6960524|1001"), ("", ""), (None, "")])
+def test_scan_xml_response_resumption_token(resumption_token, expected):
+    xml_content = make_oai_response(["<dc:date>2023-10-26</dc:date><dc:type>text</dc:type>"], resumption_token)
+    assert arxiv_fetch_daily_summaries.scan_xml_response(xml_content, set()) == expected
+
+
+def test_scan_xml_response_summary_dates():
+    summary_dates = set()
+    xml_content = make_oai_response([
+        "<dc:date>2023-10-26</dc:date><dc:type>text</dc:type>",
+        "<dc:date>2023-01-01</dc:date><dc:date>2023-10-27</dc:date><dc:type>text</dc:type>",
+        "<dc:date>2023-10-28</dc:date><dc:type>image</dc:type>",
+        "<dc:date>2023-10-29</dc:date>",
+    ])
+    arxiv_fetch_daily_summaries.scan_xml_response(xml_content, summary_dates)
+    assert summary_dates == {"2023-10-26"}
+
+
+@pytest.mark.parametrize("status_code, retry_count, retry_after, expected", [
+    (503, 0, "45", 45),
+    (503, 1, " 45 ", 45),
+    (503, 0, "Wed, 21 Oct 2015 07:28:00 GMT", 30),
+    (503, 1, "Wed, 21 Oct 2015 07:28:00 GMT", 120),
+    (503, 0, None, 30),
+    (503, 2, "45", 0),
+    (503, 3, None, 0),
+    (500, 0, "45", 0),
 ])
-def test_lambda_handler(event, expected_status_code, expected_body):
-    with patch('src.arxiv_fetch_daily_summaries.fetch_arxiv_data') as mock_fetch_arxiv_data, patch('src.arxiv_fetch_daily_summaries.upload_to_s3') as mock_upload_to_s3:
-        mock_fetch_arxiv_data.return_value = []
-        context = None  # context is not used in the function, so it's safe to set it to None
-        result = arxiv_fetch_daily_summaries.lambda_handler(event, context)
-        assert result['statusCode'] == expected_status_code
-        assert result['body'] == expected_body"""
+def test_handle_http_error_backoff(status_code, retry_count, retry_after, expected):
+    backoff_time = arxiv_fetch_daily_summaries.handle_http_error(status_code, b"<error/>", retry_count, retry_after)
+    assert backoff_time == expected
 
 
-def test_fetch_arxiv_data():
-    with patch('src.arxiv_fetch_daily_summaries.fetch_data_from_endpoint') as mock_fetch_data_from_endpoint:
-        mock_fetch_data_from_endpoint.side_effect = [("response1", "token1"), ("response2", None)]
-        result = arxiv_fetch_daily_summaries.fetch_arxiv_data("http://test.com", "2022-01-01", "test_set")
-        assert result == ["response1", "response2"]
+def test_handle_http_error_maintenance():
+    with patch.object(arxiv_fetch_daily_summaries, "schedule_for_later") as mock_schedule_for_later:
+        assert arxiv_fetch_daily_summaries.handle_http_error(503, b"Down for Maintenance", 0, "45") == 0
+        mock_schedule_for_later.assert_called_once_with()
 
 
-def test_initialize_params():
-    result = arxiv_fetch_daily_summaries.initialize_params("2022-01-01", "test_set")
-    expected = {'verb': 'ListRecords', 'set': 'test_set', 'metadataPrefix': 'oai_dc', 'from': '2022-01-01'}
-    assert result == expected
+def test_initialize_db_reconnects_dropped_connection():
+    stale_connection = MagicMock(closed=0)
+    stale_connection.cursor.return_value.__enter__.return_value.execute.side_effect = \
+        arxiv_fetch_daily_summaries.psycopg2.OperationalError("server closed the connection unexpectedly")
+    fresh_connection = MagicMock()
+    with patch.object(arxiv_fetch_daily_summaries, "_db_connection", stale_connection), \
+            patch.object(arxiv_fetch_daily_summaries.psycopg2, "connect", return_value=fresh_connection) as mock_connect:
+        stale_connection.close.side_effect = lambda: setattr(stale_connection, "closed", 1)
+        conn, _ = arxiv_fetch_daily_summaries.initialize_db()
+        assert conn is fresh_connection
+        stale_connection.close.assert_called_once_with()
+        mock_connect.assert_called_once()
 
 
-def test_fetch_data_from_endpoint_success():
-    with patch('requests.get') as mock_get:
-        mock_response = Mock()
-        mock_response.raise_for_status.return_value = None
-        mock_response.content = "<xml></xml>"
-        mock_response.text = "<xml></xml>"
-        mock_get.return_value = mock_response
-        result, token = arxiv_fetch_daily_summaries.fetch_data_from_endpoint("http://test.com", {})
-        assert result == "<xml></xml>"
-        assert token is None
+def test_initialize_db_reuses_live_connection():
+    live_connection = MagicMock(closed=0)
+    with patch.object(arxiv_fetch_daily_summaries, "_db_connection", live_connection), \
+            patch.object(arxiv_fetch_daily_summaries.psycopg2, "connect") as mock_connect:
+        conn, _ = arxiv_fetch_daily_summaries.initialize_db()
+        assert conn is live_connection
+        live_connection.cursor.return_value.__enter__.return_value.execute.assert_called_once_with("SELECT 1")
+        mock_connect.assert_not_called()
 
 
-def test_find_resumption_token():
-    xml = "<root><resumptionToken xmlns='http://www.openarchives.org/OAI/2.0/'>test_token</resumptionToken></root>"
-    root = ET.fromstring(xml)
-    result = arxiv_fetch_daily_summaries.find_resumption_token(root)
-    assert result.text == "test_token"
+def test_handle_http_error_schedules_long_retry_after():
+    with patch.object(arxiv_fetch_daily_summaries, "schedule_for_later") as mock_schedule_for_later:
+        assert arxiv_fetch_daily_summaries.handle_http_error(503, b"<error/>", 0, "3600") == 0
+        mock_schedule_for_later.assert_called_once_with()
+        retry_after = str(arxiv_fetch_daily_summaries.MAX_RETRY_AFTER_SECONDS)
+        assert arxiv_fetch_daily_summaries.handle_http_error(503, b"<error/>", 0, retry_after) == int(retry_after)
+        mock_schedule_for_later.assert_called_once_with()
 
 
-def test_handle_http_error():
-    with patch('time.sleep') as mock_sleep:
-        mock_response = Mock()
-        mock_response.status_code = 503
-        mock_response.headers = {'Retry-After': '120'}
-        arxiv_fetch_daily_summaries.handle_http_error(Exception("test"), mock_response, [30, 120])
-        mock_sleep.assert_called_with(120)
 
+class FixedDatetime(datetime):
+    @classmethod
+    def today(cls):
+        return cls(2023, 10, 30, 12, 0)
 
-def test_upload_to_s3():
-    with patch('boto3.client') as mock_client:
-        mock_s3 = Mock()
-        mock_client.return_value = mock_s3
-        arxiv_fetch_daily_summaries.upload_to_s3("test_bucket", "2022-01-01", "test_set", ["response1", "response2"])
-        mock_s3.put_object.assert_called_with(Body='["response1", "response2"]', Bucket='test_bucket', Key='arxiv/test_set-2022-01-01.json')
+
+@pytest.mark.parametrize("fetched, expected", [
+    ((date(2023, 10, 27),), "2023-10-27"),
+    (None, "2023-10-29"),
+])
+def test_get_earliest_unfetched_date(fetched, expected):
+    cursor = MagicMock()
+    cursor.fetchone.return_value = fetched
+    with patch.object(arxiv_fetch_daily_summaries, "datetime", FixedDatetime):
+        assert arxiv_fetch_daily_summaries.get_earliest_unfetched_date(cursor) == expected
+    assert cursor.execute.call_args.args[1] == ("2023-10-25", "2023-10-29")
+
+
+def test_get_earliest_unfetched_date_falls_back_to_yesterday_on_error():
+    cursor = MagicMock()
+    cursor.execute.side_effect = psycopg2.OperationalError("connection lost")
+    with patch.object(arxiv_fetch_daily_summaries, "datetime", FixedDatetime):
+        assert arxiv_fetch_daily_summaries.get_earliest_unfetched_date(cursor) == "2023-10-29"
+
+
+def test_get_earliest_unfetched_date_in_database(fetch_status_cursor):
+    arxiv_fetch_daily_summaries.insert_fetch_statuses(["2023-10-25", "2023-10-26", "2023-10-27", "2023-10-28"],
+                                                      fetch_status_cursor)
+    arxiv_fetch_daily_summaries.set_fetch_statuses(
+        [("2023-10-25", "success"), ("2023-10-26", "success"), ("2023-10-27", "failure"), ("2023-10-28", "success")],
+        fetch_status_cursor
+    )
+    with patch.object(arxiv_fetch_daily_summaries, "datetime", FixedDatetime):
+        assert arxiv_fetch_daily_summaries.get_earliest_unfetched_date(fetch_status_cursor) == "2023-10-27"
+        arxiv_fetch_daily_summaries.set_fetch_statuses([("2023-10-27", "success")], fetch_status_cursor)
+        assert arxiv_fetch_daily_summaries.get_earliest_unfetched_date(fetch_status_cursor) == "2023-10-29"
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def test_fetch_data_paces_requests():
+    clock = FakeClock()
+    pages = [b"<page>1</page>", b"<page>2</page>", b"<page>3</page>"]
+    tokens = ["token1", "token2", ""]
+    requested_params = []
+
+    def fetch_http_response(base_url, params):
+        requested_params.append(params)
+        clock.now += 2.0
+        return 200, pages[len(requested_params) - 1], None
+
+    def scan_xml_response(xml_content, summary_dates):
+        clock.now += 1.5
+        summary_dates.add("2023-10-26")
+        return tokens[pages.index(xml_content)]
+
+    with patch.object(arxiv_fetch_daily_summaries, "time", clock), \
+            patch.object(arxiv_fetch_daily_summaries, "fetch_http_response", side_effect=fetch_http_response), \
+            patch.object(arxiv_fetch_daily_summaries, "scan_xml_response", side_effect=scan_xml_response):
+        responses, summary_dates = arxiv_fetch_daily_summaries.fetch_data("http://test.com", "2023-10-26", "cs")
+
+    assert responses == pages
+    assert summary_dates == {"2023-10-26"}
+    interval = arxiv_fetch_daily_summaries.REQUEST_INTERVAL_SECONDS
+    assert clock.sleeps == [0.0, interval - 1.5, interval - 1.5]
+    assert requested_params[0]["from"] == "2023-10-26"
+    assert requested_params[1:] == [{"verb": "ListRecords", "resumptionToken": token} for token in tokens[:2]]
+
+
+def test_fetch_data_does_not_wait_when_scan_outlasts_interval():
+    clock = FakeClock()
+    pages = iter([(200, b"<page>1</page>", None), (200, b"<page>2</page>", None)])
+
+    def scan_xml_response(xml_content, summary_dates):
+        clock.now += arxiv_fetch_daily_summaries.REQUEST_INTERVAL_SECONDS + 1
+        return "token" if xml_content == b"<page>1</page>" else ""
+
+    with patch.object(arxiv_fetch_daily_summaries, "time", clock), \
+            patch.object(arxiv_fetch_daily_summaries, "fetch_http_response", side_effect=lambda *args: next(pages)), \
+            patch.object(arxiv_fetch_daily_summaries, "scan_xml_response", side_effect=scan_xml_response):
+        arxiv_fetch_daily_summaries.fetch_data("http://test.com", "2023-10-26", "cs")
+
+    assert clock.sleeps == [0.0, 0.0]
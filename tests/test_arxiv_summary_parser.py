@@ -0,0 +1,217 @@
+import gzip
+import io
+import json
+
+from botocore.exceptions import ClientError
+from lxml import etree
+import pytest
+
+from data_ingestion_service.lambdas.arxiv_summary_parser.src import arxiv_summary_parser
+
+
+def make_record(identifiers=("http://arxiv.org/abs/2310.00001",), dates=("2023-10-26",)):
+    dc_identifiers = "".join(f"<dc:identifier>{identifier}</dc:identifier>" if identifier else "<dc:identifier/>"
+                             for identifier in identifiers)
+    dc_dates = "".join(f"<dc:date>{date}</dc:date>" for date in dates)
+    return etree.fromstring(
+        '<record xmlns="http://www.openarchives.org/OAI/2.0/">'
+        "<header><identifier>oai:arXiv.org:2310.00001</identifier></header>"
+        '<metadata><oai_dc:dc xmlns:oai_dc="http://www.openarchives.org/OAI/2.0/oai_dc/" '
+        'xmlns:dc="http://purl.org/dc/elements/1.1/">'
+        "<dc:title>Title</dc:title>"
+        "<dc:creator>Smith, John</dc:creator>"
+        "<dc:subject>Computer Science - Machine Learning</dc:subject>"
+        "<dc:description>Abstract</dc:description>"
+        f"{dc_dates}{dc_identifiers}"
+        "</oai_dc:dc></metadata></record>"
+    )
+
+
+def test_extract_record_data():
+    data = arxiv_summary_parser.extract_record_data(make_record())
+    assert data["identifier"] == "oai:arXiv.org:2310.00001"
+    assert data["abstract_url"] == "http://arxiv.org/abs/2310.00001"
+    assert data["full_text_url"] == "http://arxiv.org/pdf/2310.00001"
+    assert data["authors"] == [{"last_name": "Smith", "first_name": "John"}]
+    assert data["date"] == "2023-10-26"
+
+
+def test_extract_record_data_skips_empty_identifier():
+    assert arxiv_summary_parser.extract_record_data(make_record(identifiers=("",))) == {}
+
+
+def test_extract_record_data_ignores_empty_identifier_before_url():
+    data = arxiv_summary_parser.extract_record_data(make_record(identifiers=("", "http://arxiv.org/abs/2310.00001")))
+    assert data["abstract_url"] == "http://arxiv.org/abs/2310.00001"
+
+
+def test_extract_record_data_skips_multiple_dates():
+    assert arxiv_summary_parser.extract_record_data(make_record(dates=("2023-10-26", "2023-10-27"))) == {}
+
+
+class FakeRangedClient:
+    def __init__(self, data, replaced_after=None):
+        self.data = data
+        self.replaced_after = replaced_after
+        self.ranges = []
+
+    def get_object(self, Bucket, Key, Range, IfMatch):
+        if self.replaced_after is not None and len(self.ranges) >= self.replaced_after:
+            raise ClientError({"Error": {"Code": "PreconditionFailed"}}, "GetObject")
+        start, end = (int(position) for position in Range[len("bytes="):].split("-"))
+        self.ranges.append((start, end))
+        return {"Body": io.BytesIO(self.data[start:end + 1])}
+
+
+def make_ranged_reader(monkeypatch, size, replaced_after=None):
+    monkeypatch.setattr(arxiv_summary_parser, "RANGED_GET_SIZE", 4)
+    monkeypatch.setattr(arxiv_summary_parser, "RANGED_GET_CONCURRENCY", 2)
+    data = bytes(range(size))
+    client = FakeRangedClient(data, replaced_after)
+    response = {"ETag": '"v1"', "Body": io.BytesIO(data), "ContentLength": size}
+    return arxiv_summary_parser.RangedObjectReader(client, "bucket", "key", response), client, data
+
+
+def read_all(reader, size):
+    chunks = []
+    chunk = reader.read(size)
+    while chunk:
+        assert len(chunk) <= size
+        chunks.append(chunk)
+        chunk = reader.read(size)
+    return b"".join(chunks)
+
+
+@pytest.mark.parametrize("size", [5, 10, 12])
+def test_ranged_object_reader_read_all(monkeypatch, size):
+    reader, _, data = make_ranged_reader(monkeypatch, size)
+    assert reader.read(-1) == data
+    assert reader.read(-1) == b""
+    reader.close()
+
+
+@pytest.mark.parametrize("read_size", [1, 3, 6])
+def test_ranged_object_reader_small_reads(monkeypatch, read_size):
+    reader, _, data = make_ranged_reader(monkeypatch, 10)
+    assert read_all(reader, read_size) == data
+    reader.close()
+
+
+def test_ranged_object_reader_read_across_range_boundary(monkeypatch):
+    reader, _, data = make_ranged_reader(monkeypatch, 10)
+    assert reader.read(3) == data[:3]
+    assert reader.read(3) == data[3:4]
+    assert reader.read(3) == data[4:7]
+    assert reader.read(3) == data[7:8]
+    reader.close()
+
+
+def test_ranged_object_reader_exact_multiple_of_range_size(monkeypatch):
+    reader, client, data = make_ranged_reader(monkeypatch, 12)
+    assert read_all(reader, 4) == data
+    assert client.ranges == [(4, 7), (8, 11)]
+    reader.close()
+
+
+def test_ranged_object_reader_object_replaced_mid_read(monkeypatch):
+    reader, _, data = make_ranged_reader(monkeypatch, 20, replaced_after=1)
+    assert reader.read(4) == data[:4]
+    with pytest.raises(ClientError) as error:
+        read_all(reader, 4)
+    assert error.value.response["Error"]["Code"] == "PreconditionFailed"
+    reader.close()
+
+
+@pytest.mark.parametrize("subject, expected", [
+    ("Quantum Physics", ("quant-ph", "quant-ph")),
+    ("Quantitative Finance - Economics", ("q-fin", "EC")),
+    ("Economics - Econometrics", ("econ", "EM")),
+    ("Computer Science - Machine Learning", ("cs", "LG")),
+    ("Physics - Optics", ("physics", "optics")),
+    ("Mathematical Physics", ("math-ph", "math-ph")),
+    ("Computer Science - Nonexistent", ("cs", None)),
+    ("Statistics - Machine Learning", None),
+])
+def test_match_subject(subject, expected):
+    assert arxiv_summary_parser.match_subject(subject) == expected
+
+
+def test_ranged_object_reader_zero_size_read_keeps_data(monkeypatch):
+    reader, _, data = make_ranged_reader(monkeypatch, 20)
+    assert reader.read(2) == data[:2]
+    assert reader.read(0) == b""
+    assert reader.read(-1) == data[2:]
+    reader.close()
+
+
+
+def make_summary_document():
+    return (b"<?xml version='1.0' encoding='UTF-8'?>"
+            b"<OAI-PMH xmlns='http://www.openarchives.org/OAI/2.0/'><ListRecords>"
+            + etree.tostring(make_record()) + b"</ListRecords></OAI-PMH>")
+
+
+class FakeParserClient:
+    def __init__(self, objects):
+        self.objects = objects
+        self.uploads = {}
+
+    def get_object(self, Bucket, Key):
+        if Key not in self.objects:
+            raise ClientError({"Error": {"Code": "NoSuchKey"}}, "GetObject")
+        body = self.objects[Key]
+        return {"Body": io.BytesIO(body), "ContentLength": len(body), "ContentEncoding": "gzip", "ETag": '"v1"'}
+
+    def put_object(self, Body, Bucket, Key, ContentType, ContentEncoding):
+        self.uploads[Key] = (Body, ContentEncoding)
+
+
+def make_event(*keys):
+    return {"Records": [{"s3": {"bucket": {"name": "inbound"}, "object": {"key": key}}} for key in keys]}
+
+
+@pytest.fixture
+def parser_client(monkeypatch):
+    monkeypatch.setattr(arxiv_summary_parser, "BUCKET_NAME", "parsed-bucket")
+    monkeypatch.setattr(arxiv_summary_parser, "SAVE_PATH", "parsed")
+    monkeypatch.setattr(arxiv_summary_parser, "zstandard", None)
+    client = FakeParserClient({
+        "arxiv/cs-2023-10-30-0.xml": gzip.compress(make_summary_document()),
+        "arxiv/cs-2023-10-30-1.xml": gzip.compress(b"\n  " + make_summary_document()),
+    })
+    monkeypatch.setattr(arxiv_summary_parser, "get_s3_client", lambda: client)
+    return client
+
+
+def test_lambda_handler_processes_every_object(parser_client):
+    result = arxiv_summary_parser.lambda_handler(make_event("arxiv/cs-2023-10-30-0.xml", "arxiv/cs-2023-10-30-1.xml"), None)
+    assert result["statusCode"] == 200
+    assert sorted(parser_client.uploads) == ["parsed/cs-2023-10-30-0.xml-parsed.json",
+                                             "parsed/cs-2023-10-30-1.xml-parsed.json"]
+    for body, content_encoding in parser_client.uploads.values():
+        assert content_encoding == "gzip"
+        records = json.loads(gzip.decompress(body))["records"]
+        assert [record["identifier"] for record in records] == ["oai:arXiv.org:2310.00001"]
+
+
+def test_lambda_handler_rejects_event_without_records(parser_client):
+    assert arxiv_summary_parser.lambda_handler({"Records": []}, None)["statusCode"] == 400
+    assert arxiv_summary_parser.lambda_handler({}, None)["statusCode"] == 400
+    assert parser_client.uploads == {}
+
+
+def test_lambda_handler_reports_failed_object(parser_client):
+    result = arxiv_summary_parser.lambda_handler(make_event("arxiv/cs-2023-10-30-0.xml", "arxiv/missing.xml"), None)
+    assert result["statusCode"] == 500
+    assert list(parser_client.uploads) == ["parsed/cs-2023-10-30-0.xml-parsed.json"]
+
+
+def test_sanitizing_reader_drops_leading_whitespace_and_control_bytes():
+    reader = arxiv_summary_parser.SanitizingReader(io.BytesIO(b" \n\t\x00<a>\x01b\xc3\xa9c\r\n</a>"))
+    assert read_all(reader, 4) == b"<a>bc\r\n</a>"
+
+
+def test_sanitizing_reader_passes_gzip_streams_through():
+    response = {"ContentEncoding": "gzip"}
+    stream = arxiv_summary_parser.decode_object_stream(io.BytesIO(gzip.compress(b"\n<a>\x07text</a>")), response)
+    assert arxiv_summary_parser.SanitizingReader(stream).read() == b"<a>text</a>"
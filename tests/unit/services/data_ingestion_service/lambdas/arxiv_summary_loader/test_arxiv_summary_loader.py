@@ -1,106 +1,212 @@
+import io
 import json
 from unittest.mock import patch, MagicMock
 import pytest
 
 from data_ingestion_service.lambdas.arxiv_summary_loader.src import arxiv_summary_loader
+from data_ingestion_service.lambdas.arxiv_summary_parser.src import arxiv_summary_parser
 
-def test_lambda_handler():
-    s3_event = {
-        'Records': [
-            {
-                's3': {
-                    'bucket': {
-                        'name': 'test-bucket'
-                    },
-                    'object': {
-                        'key': 'test-key'
-                    }
-                }
-            }
-        ]
-    }
 
-    with patch('your_lambda_file.boto3') as mock_boto3, \
-            patch('your_lambda_file.insert_record') as mock_insert_record:
-        mock_s3 = MagicMock()
-        mock_boto3.client.return_value = mock_s3
-
-        mock_s3.get_object.return_value = {
-            'Body': json.dumps({'records': [{'identifier': 'test-identifier'}]})
-        }
-
-        arxiv_summary_loader.lambda_handler(s3_event, None)
-
-        mock_insert_record.assert_called_once_with({'identifier': 'test-identifier'})
-
-
-def test_parse_record():
-    record = {
-        'identifier': 'test-identifier',
-        'abstract_url': 'test-abstract-url',
-        'authors': [
-            {
-                'last_name': 'test-last-name-1',
-                'first_name': 'test-first-name-1'
-            },
-            {
-                'last_name': 'test-last-name-2',
-                'first_name': 'test-first-name-2'
-            },
-        ],
-        'primary_category': 'test-primary-category',
-        'categories': ['test-category-1', 'test-category-2'],
+def make_record(number, authors=(('Smith', 'John'),)):
+    return {
+        'identifier': f'oai:arXiv.org:2310.{number:05d}',
+        'abstract_url': f'http://arxiv.org/abs/2310.{number:05d}',
+        'full_text_url': f'http://arxiv.org/pdf/2310.{number:05d}',
+        'authors': [{'last_name': last_name, 'first_name': first_name} for last_name, first_name in authors],
+        'primary_category': 'LG',
+        'categories': ['Machine Learning'],
         'abstract': 'test-abstract',
         'title': 'test-title',
         'date': '2023-10-30',
-        'group': 'test-group'
+        'primary_group': 'cs',
+        'groups': ['cs'],
     }
 
-    result = arxiv_summary_loader.parse_record(record)
-
-    assert result['unique_identifier'] == 'test-identifier'
-    assert result['abstract_url'] == 'test-abstract-url'
-    assert result['title'] == 'test-title'
-    assert result['primary_category'] == 'test-primary-category'
-    assert result['summary'] == 'test-abstract'
-    assert result['date'] == '2023-10-30'
-    assert result['group_name'] == 'test-group'
-    assert result['categories'] == ['test-category-1', 'test-category-2']
-    assert len(result['authors']) == 2
-    assert result['authors'][0]['last_name'] == 'test-last-name-1'
-    assert result['authors'][0]['first_name'] == 'test-first-name-1'
-
-
-def test_insert_record():
-    record = {
-        'unique_identifier': 'test-identifier',
-        'abstract_url': 'test-abstract-url',
-        'title': 'test-title',
-        'primary_category': 'test-primary-category',
-        'summary': 'test-abstract',
-        'date': '2023-10-30',
-        'group_name': 'test-group',
-        'categories': ['test-category-1', 'test-category-2'],
-        'authors': [
-            {
-                'last_name': 'test-last-name-1',
-                'first_name': 'test-first-name-1'
-            },
-            {
-                'last_name': 'test-last-name-2',
-                'first_name': 'test-first-name-2'
-            },
-        ]
-    }
 
-    with patch('your_lambda_file.psycopg2') as mock_psycopg2:
-        mock_connection = MagicMock()
-        mock_cursor = MagicMock()
+def make_cursor(fetched_rows):
+    cursor = MagicMock()
+    cursor.connection.prepared_statements = set()
+    cursor.fetchall.return_value = fetched_rows
+    return cursor
+
 
-        mock_psycopg2.connect.return_value = mock_connection
-        mock_connection.cursor.return_value = mock_cursor
+def copied_rows(cursor):
+    buffer = cursor.copy_expert.call_args.args[1]
+    return [line.split('\t') for line in buffer.getvalue().splitlines()]
 
-        insert_record(record)
 
-        assert mock_cursor.execute.call_count == 6  # 1 research + 2 authors + 1 research_author junction table for each author
-        mock_connection.commit.assert_called_once()
+def test_lambda_handler():
+    s3_event = {'Records': [{'s3': {'bucket': {'name': 'test-bucket'}, 'object': {'key': 'test-key'}}}]}
+    records = [make_record(1)]
+    mock_s3 = MagicMock()
+    mock_s3.get_object.return_value = {'Body': io.BytesIO(json.dumps({'records': records}).encode())}
+    with patch.object(arxiv_summary_loader, 'get_s3_client', return_value=mock_s3), \
+            patch.object(arxiv_summary_loader, 'process_records') as mock_process_records:
+        result = arxiv_summary_loader.lambda_handler(s3_event, None)
+
+    assert result['statusCode'] == 200
+    mock_s3.get_object.assert_called_once_with(Bucket='test-bucket', Key='test-key')
+    mock_process_records.assert_called_once_with(records)
+
+
+def test_insert_research():
+    records = [make_record(2), make_record(1), make_record(2)]
+    cursor = make_cursor([('oai:arXiv.org:2310.00001', 11), ('oai:arXiv.org:2310.00002', 12)])
+    lookups = {'categories_by_abbreviation': {'LG': 3}, 'groups': {'cs': 4}}
+
+    research_ids = arxiv_summary_loader.insert_research(records, lookups, cursor)
+
+    assert research_ids == {'oai:arXiv.org:2310.00001': 11, 'oai:arXiv.org:2310.00002': 12}
+    rows = copied_rows(cursor)
+    assert [row[0] for row in rows] == ['oai:arXiv.org:2310.00001', 'oai:arXiv.org:2310.00002']
+    assert rows[0][6:] == ['3', '4']
+    assert cursor.connection.prepared_statements == {'upsert_research', 'select_research_ids'}
+
+
+def test_insert_research_raises_when_ids_are_missing():
+    cursor = make_cursor([('oai:arXiv.org:2310.00001', 11)])
+    lookups = {'categories_by_abbreviation': {}, 'groups': {}}
+    with pytest.raises(Exception, match='Research record not found'):
+        arxiv_summary_loader.insert_research([make_record(1), make_record(2)], lookups, cursor)
+
+
+def test_insert_authors():
+    records = [make_record(1, authors=(('Smith', 'John'), ('Doe', 'Jane'))), make_record(2)]
+    cursor = make_cursor([('Doe', 'Jane', 21), ('Smith', 'John', 22)])
+
+    author_ids = arxiv_summary_loader.insert_authors(records, cursor)
+
+    assert author_ids == {('Doe', 'Jane'): 21, ('Smith', 'John'): 22}
+    assert copied_rows(cursor) == [['Doe', 'Jane'], ['Smith', 'John']]
+    assert cursor.connection.prepared_statements == {'upsert_research_authors', 'select_research_author_ids'}
+
+
+def test_process_records():
+    records = [make_record(number) for number in range(5)]
+    conn = MagicMock(closed=0)
+    author_ids = {('Smith', 'John'): 1}
+    with patch.object(arxiv_summary_loader, 'RECORDS_PER_COMMIT', 2), \
+            patch.object(arxiv_summary_loader, 'get_postgresql_connection', return_value=conn), \
+            patch.object(arxiv_summary_loader, 'release_postgresql_connection') as mock_release, \
+            patch.object(arxiv_summary_loader, 'get_lookups', return_value={}), \
+            patch.object(arxiv_summary_loader, 'insert_authors', return_value=author_ids) as mock_insert_authors, \
+            patch.object(arxiv_summary_loader, 'process_batch') as mock_process_batch:
+        arxiv_summary_loader.process_records(records)
+
+    mock_insert_authors.assert_called_once_with(records, conn.cursor.return_value)
+    batches = sorted((call.args[0] for call in mock_process_batch.call_args_list), key=lambda batch: batch[0]['identifier'])
+    assert batches == [records[0:2], records[2:4], records[4:5]]
+    assert all(call.args[2] is author_ids for call in mock_process_batch.call_args_list)
+    assert conn.commit.call_count == 4
+    assert mock_release.call_count == 4
+    conn.rollback.assert_not_called()
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('plain text', 'plain text'),
+    ('a\tb', 'a\\tb'),
+    ('a\nb', 'a\\nb'),
+    ('a\rb', 'a\\rb'),
+    ('a\\b', 'a\\\\b'),
+    ('\\N', '\\\\N'),
+    ('\\t\t', '\\\\t\\t'),
+    (None, '\\N'),
+    (42, '42'),
+])
+def test_format_copy_value(value, expected):
+    assert arxiv_summary_loader.format_copy_value(value) == expected
+
+
+def make_pooled_connection(alive):
+    conn = MagicMock()
+    if not alive:
+        conn.cursor.return_value.__enter__.return_value.execute.side_effect = \
+            arxiv_summary_loader.psycopg2.OperationalError('server closed the connection unexpectedly')
+    return conn
+
+
+def test_get_postgresql_connection_skips_stale_connections():
+    stale_connections = [make_pooled_connection(alive=False) for _ in range(2)]
+    live_connection = make_pooled_connection(alive=True)
+    pool = MagicMock()
+    pool.getconn.side_effect = stale_connections + [live_connection]
+    with patch.object(arxiv_summary_loader, 'get_connection_pool', return_value=pool):
+        assert arxiv_summary_loader.get_postgresql_connection() is live_connection
+    for conn in stale_connections:
+        pool.putconn.assert_any_call(conn, close=True)
+
+
+def test_get_postgresql_connection_opens_fresh_connection_after_draining_pool():
+    stale_connections = [
+        make_pooled_connection(alive=False) for _ in range(arxiv_summary_loader.DATABASE_POOL_MAX_CONNECTIONS)
+    ]
+    fresh_connection = MagicMock()
+    pool = MagicMock()
+    pool.getconn.side_effect = stale_connections + [fresh_connection]
+    with patch.object(arxiv_summary_loader, 'get_connection_pool', return_value=pool):
+        assert arxiv_summary_loader.get_postgresql_connection() is fresh_connection
+    assert pool.putconn.call_count == len(stale_connections)
+
+
+PARSED_DATA = {'records': [make_record(1), make_record(2, authors=(('Doe', 'Jane'),))]}
+
+
+def upload_parsed_data(monkeypatch, zstandard):
+    monkeypatch.setattr(arxiv_summary_parser, 'zstandard', zstandard)
+    monkeypatch.setattr(arxiv_summary_parser, 'BUCKET_NAME', 'test-bucket')
+    monkeypatch.setattr(arxiv_summary_parser, 'SAVE_PATH', 'parsed')
+    parser_s3 = MagicMock()
+    arxiv_summary_parser.upload_to_s3(parser_s3, PARSED_DATA, 'arxiv/cs-2023-10-30-1.xml')
+    upload = parser_s3.put_object.call_args.kwargs
+    assert upload['Key'] == 'parsed/cs-2023-10-30-1.xml-parsed.json'
+    return {'Body': io.BytesIO(upload['Body']), 'ContentEncoding': upload['ContentEncoding']}
+
+
+def read_parsed_object(response):
+    loader_s3 = MagicMock()
+    loader_s3.get_object.return_value = response
+    with patch.object(arxiv_summary_loader, 'get_s3_client', return_value=loader_s3):
+        return arxiv_summary_loader.get_s3_file_content('test-bucket', 'parsed/cs-2023-10-30-1.xml-parsed.json')
+
+
+def test_get_s3_file_content_reads_zstd_parser_output(monkeypatch):
+    zstandard = pytest.importorskip('zstandard')
+    response = upload_parsed_data(monkeypatch, zstandard)
+    assert response['ContentEncoding'] == 'zstd'
+    assert json.loads(read_parsed_object(response)) == PARSED_DATA
+
+
+def test_get_s3_file_content_reads_gzip_parser_output(monkeypatch):
+    response = upload_parsed_data(monkeypatch, None)
+    assert response['ContentEncoding'] == 'gzip'
+    assert json.loads(read_parsed_object(response)) == PARSED_DATA
+
+
+def test_get_s3_file_content_reads_unencoded_object():
+    body = json.dumps(PARSED_DATA).encode()
+    assert read_parsed_object({'Body': io.BytesIO(body)}) == body
+
+
+def test_get_s3_file_content_requires_zstandard_for_zstd(monkeypatch):
+    zstandard = pytest.importorskip('zstandard')
+    response = upload_parsed_data(monkeypatch, zstandard)
+    monkeypatch.setattr(arxiv_summary_loader, 'zstandard', None)
+    with pytest.raises(RuntimeError, match='zstandard is required'):
+        read_parsed_object(response)
+
+
+def test_validate_record_lists_missing_fields():
+    record = make_record(1)
+    del record['title'], record['abstract']
+    with pytest.raises(ValueError) as error:
+        arxiv_summary_loader.validate_record(record)
+    assert str(error.value) == "Record oai:arXiv.org:2310.00001 is missing fields: ['abstract', 'title']"
+
+
+def test_process_records_writes_nothing_when_a_record_is_missing_fields():
+    records = [make_record(1), make_record(2)]
+    del records[1]['date']
+    with patch.object(arxiv_summary_loader, 'get_postgresql_connection') as mock_get_connection:
+        with pytest.raises(ValueError, match=r"oai:arXiv.org:2310.00002 is missing fields: \['date'\]"):
+            arxiv_summary_loader.process_records(records)
+    mock_get_connection.assert_not_called()